@@ -0,0 +1,63 @@
+import io
+import numpy as np
+import soundfile as sf
+
+# Response codecs: name -> (container, subtype, media type)
+AUDIO_FORMATS = {
+    "wav": ("WAV", "PCM_16", "audio/wav"),
+    "flac": ("FLAC", "PCM_16", "audio/flac"),
+    "ogg": ("OGG", "VORBIS", "audio/ogg"),
+    "opus": ("OGG", "OPUS", "audio/ogg; codecs=opus"),
+}
+
+# Opus only runs at these rates; anything else is resampled to 48 kHz
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+RESAMPLE_BLOCK = 65536
+
+def _lowpass(audio: np.ndarray, cutoff: float, taps: int = 63) -> np.ndarray:
+    """Windowed-sinc low-pass filter; cutoff is a fraction of the sample rate"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    kernel /= kernel.sum()
+    return np.convolve(audio, kernel.astype(np.float32), mode="same")
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Resample mono float32 audio with an anti-aliasing filter and linear interpolation.
+
+    Output is produced in fixed-size blocks so temporaries stay small no
+    matter how long the input is.
+    """
+    if orig_sr == target_sr or len(audio) < 2:
+        return audio.astype(np.float32, copy=False)
+    if target_sr < orig_sr:
+        audio = _lowpass(audio, 0.5 * target_sr / orig_sr)
+
+    n_out = int(round(len(audio) * target_sr / orig_sr))
+    step = orig_sr / target_sr
+    out = np.empty(n_out, dtype=np.float32)
+    for start in range(0, n_out, RESAMPLE_BLOCK):
+        stop = min(start + RESAMPLE_BLOCK, n_out)
+        positions = np.arange(start, stop, dtype=np.float64) * step
+        index = np.minimum(positions.astype(np.int64), len(audio) - 2)
+        frac = np.minimum(positions - index, 1.0).astype(np.float32)
+        left = audio[index]
+        out[start:stop] = left + (audio[index + 1] - left) * frac
+    return out
+
+def encode_audio(audio: np.ndarray, sample_rate: int, audio_format: str = "wav", target_sr: int = 0) -> bytes:
+    """Encode mono float32 PCM, optionally resampled to `target_sr`"""
+    container, subtype, _ = AUDIO_FORMATS[audio_format]
+    if target_sr and target_sr != sample_rate:
+        audio = resample(audio, sample_rate, target_sr)
+        sample_rate = target_sr
+    if audio_format == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+        audio = resample(audio, sample_rate, 48000)
+        sample_rate = 48000
+
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, samplerate=sample_rate, format=container, subtype=subtype)
+    return buffer.getvalue()
+
+def media_type(audio_format: str) -> str:
+    return AUDIO_FORMATS[audio_format][2]
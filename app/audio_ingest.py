@@ -0,0 +1,57 @@
+import io
+import os
+import numpy as np
+import soundfile as sf
+from typing import BinaryIO, Union
+from audio_codec import resample
+from config.logging import logger
+
+WHISPER_SAMPLE_RATE = 16000
+BLOCK_FRAMES = 65536
+
+class AudioTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size or duration limit"""
+
+def _source_size(source: BinaryIO) -> int:
+    position = source.tell()
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+def ingest_audio(source: Union[bytes, BinaryIO], max_bytes: int, max_seconds: float) -> np.ndarray:
+    """Decode an upload to 16 kHz mono float32 PCM for Whisper.
+
+    `source` may be raw bytes or a seekable file object such as the spooled
+    temp file behind an UploadFile, which is decoded in place without reading
+    it into memory first. Frames are decoded straight to float32 in blocks and
+    downmixed into a single preallocated mono buffer, then resampled.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    size = _source_size(source)
+    if size > max_bytes:
+        raise AudioTooLargeError(f"Upload of {size} bytes exceeds the {max_bytes} byte limit")
+
+    with sf.SoundFile(source) as f:
+        sample_rate, channels, frames = f.samplerate, f.channels, f.frames
+        if frames > max_seconds * sample_rate:
+            raise AudioTooLargeError(f"Audio of {frames / sample_rate:.1f}s exceeds the {max_seconds}s limit")
+
+        if channels == 1:
+            audio = f.read(dtype="float32")
+        else:
+            audio = np.empty(frames, dtype=np.float32)
+            block = np.empty((BLOCK_FRAMES, channels), dtype=np.float32)
+            position = 0
+            while position < frames:
+                read = f.read(BLOCK_FRAMES, dtype="float32", out=block)
+                if not len(read):
+                    break
+                np.mean(read, axis=1, out=audio[position:position + len(read)])
+                position += len(read)
+            audio = audio[:position]
+
+    logger.info("Audio ingested: sr=%s, channels=%s, frames=%s", sample_rate, channels, frames)
+    return resample(audio, sample_rate, WHISPER_SAMPLE_RATE)
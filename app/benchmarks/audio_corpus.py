@@ -0,0 +1,106 @@
+"""Synthetic voice-query corpus of varying lengths for the pipeline benchmarks.
+
+By default clips are speech-shaped tones: voiced bursts with a syllable-rate
+envelope separated by short pauses, so VAD and the decoder see realistic
+structure. With --speech the benchmark queries are rendered with espeak-ng
+instead and padded to the requested lengths, which gives Whisper real words.
+
+Run from the app directory:
+    python -m benchmarks.audio_corpus --out benchmarks/corpus --durations 1 3 5 10 20
+"""
+import argparse
+import io
+import os
+from typing import Dict, List, Optional
+import numpy as np
+import soundfile as sf
+from audio_codec import resample
+
+SAMPLE_RATE = 16000
+DEFAULT_DURATIONS = (1.0, 3.0, 5.0, 10.0, 20.0)
+
+# Spoken with --speech; the fake STT backend also answers with these
+QUERIES = [
+    "What projects have you built?",
+    "Tell me about ReguLens",
+    "How did you learn machine learning?",
+    "What are you currently learning?",
+    "What did you do in the GDSC team?",
+    "Explain how your RAG pipeline works",
+]
+
+def speech_like(seconds: float, seed: int = 0) -> np.ndarray:
+    """Voiced bursts (harmonics of a drifting pitch) with pauses between them"""
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    position = int(0.2 * SAMPLE_RATE)
+    while position < len(audio):
+        burst = min(int(rng.uniform(0.4, 1.5) * SAMPLE_RATE), len(audio) - position)
+        t = np.arange(burst, dtype=np.float32) / SAMPLE_RATE
+        pitch = rng.uniform(100, 220) * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+        envelope = 0.5 * (1 - np.cos(2 * np.pi * 4 * t)) * np.hanning(burst)
+        audio[position:position + burst] = 0.15 * voiced * envelope
+        position += burst + int(rng.uniform(0.1, 0.4) * SAMPLE_RATE)
+    audio += 0.002 * rng.standard_normal(len(audio)).astype(np.float32)
+    return audio
+
+def spoken(text: str, seconds: float, engine) -> np.ndarray:
+    """Render `text` with a TTS engine and pad or repeat it to `seconds`"""
+    samples, sample_rate = engine.synthesize(text)
+    samples = resample(samples, sample_rate, SAMPLE_RATE)
+    target = int(seconds * SAMPLE_RATE)
+    gap = np.zeros(int(0.3 * SAMPLE_RATE), dtype=np.float32)
+    pieces, length = [], 0
+    while length < target:
+        pieces.extend([samples, gap])
+        length += len(samples) + len(gap)
+    return np.concatenate(pieces)[:target]
+
+def to_wav(audio: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+def build_corpus(durations=DEFAULT_DURATIONS, speech_engine=None) -> Dict[str, bytes]:
+    """Map of clip name -> WAV bytes, one clip per duration"""
+    corpus = {}
+    for i, seconds in enumerate(durations):
+        if speech_engine is not None:
+            audio = spoken(QUERIES[i % len(QUERIES)], seconds, speech_engine)
+        else:
+            audio = speech_like(seconds, seed=i)
+        corpus[f"clip_{seconds:g}s"] = to_wav(audio)
+    return corpus
+
+def load_corpus(directory: Optional[str], durations: List[float], speech: bool) -> Dict[str, bytes]:
+    """Read WAV clips from `directory`, or synthesize them when none is given"""
+    if directory:
+        return {
+            os.path.splitext(name)[0]: open(os.path.join(directory, name), "rb").read()
+            for name in sorted(os.listdir(directory)) if name.endswith(".wav")
+        }
+    engine = None
+    if speech:
+        from config.setting import Config
+        from tts_engines import EspeakEngine
+
+        engine = EspeakEngine(Config.espeak_binary, Config.tts_voice, Config.tts_speed)
+    return build_corpus(durations, engine)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="benchmarks/corpus")
+    parser.add_argument("--durations", type=float, nargs="+", default=list(DEFAULT_DURATIONS))
+    parser.add_argument("--speech", action="store_true", help="Render real speech with espeak-ng")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for name, wav in load_corpus(None, args.durations, args.speech).items():
+        with open(os.path.join(args.out, f"{name}.wav"), "wb") as f:
+            f.write(wav)
+        print(f"{name}.wav {len(wav)} bytes")
+
+if __name__ == "__main__":
+    main()
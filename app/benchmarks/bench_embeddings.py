@@ -0,0 +1,104 @@
+"""Latency, throughput and retrieval agreement of the embedding runtimes.
+
+For each runtime this reports per-query latency (query cache bypassed),
+docs/sec for batched embed_documents over the corpus chunks, and recall@k of
+each runtime's top-k chunks against the fp32 torch baseline, so quantization
+can be checked for retrieval drift on the real corpus.
+
+Run from the app directory (settings are read from .env as usual):
+    python -m benchmarks.bench_embeddings --runtimes torch int8 onnx
+"""
+import argparse
+import json
+import statistics
+import time
+import numpy as np
+from ingestion import CorpusIngestor
+from vector_store import SentenceTransformerEmbeddings
+
+QUERIES = [
+    "What projects have you built?",
+    "Tell me about your projects",
+    "What is ReguLens?",
+    "How did you learn machine learning?",
+    "What are you currently learning?",
+    "What was your CGPA?",
+    "What did you do in the GDSC team?",
+    "Which AI tools do you like to use?",
+    "What are your growth areas?",
+    "Explain how your RAG pipeline works",
+]
+
+def load_chunks(sources):
+    ingestor = CorpusIngestor(None, sources, manifest_path="", batch_size=0, upsert_workers=1)
+    return [text for _, text in ingestor.collect_chunks().values()]
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    docs = doc_vectors / np.linalg.norm(doc_vectors, axis=1, keepdims=True)
+    queries = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    return np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+
+def bench_runtime(runtime: str, chunks, repeat: int, onnx_file: str) -> dict:
+    embeddings = SentenceTransformerEmbeddings(runtime=runtime, onnx_file=onnx_file)
+    embeddings._encode_query(QUERIES[0])  # warm-up
+
+    latencies = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            embeddings._encode_query(query)
+            latencies.append(1000 * (time.perf_counter() - started))
+
+    docs = chunks * max(1, 512 // max(len(chunks), 1))
+    started = time.perf_counter()
+    embeddings.embed_documents(docs)
+    docs_per_sec = len(docs) / (time.perf_counter() - started)
+
+    return {
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": float(np.percentile(latencies, 95)),
+        "docs_per_sec": docs_per_sec,
+        "doc_vectors": np.asarray(embeddings.embed_documents(chunks), dtype=np.float32),
+        "query_vectors": np.asarray([embeddings._encode_query(q) for q in QUERIES], dtype=np.float32)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runtimes", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--sources", nargs="+", default=["data/*.txt"])
+    parser.add_argument("--onnx-file", default="", help="ONNX file inside the model repo, e.g. a qint8 export")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.sources)
+    if not chunks:
+        raise SystemExit(f"No chunks found in {args.sources}")
+
+    results = {runtime: bench_runtime(runtime, chunks, args.repeat, args.onnx_file) for runtime in args.runtimes}
+    baseline = results.get("torch") or next(iter(results.values()))
+    baseline_top = top_k(baseline["doc_vectors"], baseline["query_vectors"], args.k)
+
+    report = {}
+    for runtime, r in results.items():
+        runtime_top = top_k(r["doc_vectors"], r["query_vectors"], args.k)
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(baseline_top, runtime_top)])
+        report[runtime] = {
+            "query_p50_ms": round(r["query_p50_ms"], 3),
+            "query_p95_ms": round(r["query_p95_ms"], 3),
+            "docs_per_sec": round(r["docs_per_sec"], 1),
+            f"recall@{args.k}": round(float(recall), 3)
+        }
+
+    if args.json:
+        print(json.dumps({"chunks": len(chunks), "results": report}, indent=2))
+        return
+
+    print(f"{len(chunks)} chunks, {len(QUERIES)} queries, k={args.k}")
+    print(f"{'runtime':>8} {'p50 ms':>8} {'p95 ms':>8} {'docs/s':>10} {'recall@k':>9}")
+    for runtime, r in report.items():
+        print(f"{runtime:>8} {r['query_p50_ms']:>8.2f} {r['query_p95_ms']:>8.2f} {r['docs_per_sec']:>10.1f} {r[f'recall@{args.k}']:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Peak memory and latency of the audio ingest stage per request.
+
+Compares the original `sf.read(io.BytesIO(data))` + `astype(np.float32)` path
+with `ingest_audio` decoding from a spooled temp file, on synthetic 44.1 kHz
+stereo uploads of increasing length.
+
+Run from the app directory:
+    python -m benchmarks.bench_ingest --durations 10 30 60 120
+"""
+import argparse
+import io
+import json
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import soundfile as sf
+from audio_ingest import ingest_audio
+
+SAMPLE_RATE = 44100
+
+def make_upload(seconds: float) -> bytes:
+    rng = np.random.default_rng(0)
+    frames = int(seconds * SAMPLE_RATE)
+    audio = (0.1 * rng.standard_normal((frames, 2))).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, samplerate=SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+def legacy_ingest(upload) -> np.ndarray:
+    audio_data = upload.read()
+    audio, _ = sf.read(io.BytesIO(audio_data))
+    return audio.astype(np.float32)
+
+def measure(fn, upload_bytes: bytes) -> dict:
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as upload:
+        upload.write(upload_bytes)
+        upload.seek(0)
+        tracemalloc.start()
+        started = time.perf_counter()
+        audio = fn(upload)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"peak_mb": peak / 2 ** 20, "ms": 1000 * elapsed, "samples": len(audio)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[10, 30, 60, 120])
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    for seconds in args.durations:
+        upload_bytes = make_upload(seconds)
+        results.append({
+            "seconds": seconds,
+            "upload_mb": len(upload_bytes) / 2 ** 20,
+            "legacy": measure(legacy_ingest, upload_bytes),
+            "ingest": measure(lambda f: ingest_audio(f, len(upload_bytes), seconds + 1), upload_bytes)
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'seconds':>8} {'upload MB':>10} {'legacy peak MB':>15} {'ingest peak MB':>15} {'legacy ms':>10} {'ingest ms':>10}")
+    for r in results:
+        print(
+            f"{r['seconds']:>8.0f} {r['upload_mb']:>10.1f} {r['legacy']['peak_mb']:>15.1f} "
+            f"{r['ingest']['peak_mb']:>15.1f} {r['legacy']['ms']:>10.1f} {r['ingest']['ms']:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
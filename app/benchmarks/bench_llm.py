@@ -0,0 +1,143 @@
+"""Latency and failure handling of LLM calls with and without hedging.
+
+Starts benchmarks.fake_openai with a slow tail and injected errors, then
+sends the same load from `--users` simulated users through ChatGroq on the
+pooled async client and ResilientLLMCaller, for each provider concurrency
+limit in `--limits`: once without hedging and once with it. Hedges are
+only sent while a slot is free, so a limit at or below the user count
+shows how hedging backs off at saturation and a limit above it shows its
+effect on the tail. Reports p50/p95/p99, deadline misses, errors, hedges
+and the hedge rate per run.
+
+Run from the app directory:
+    python -m benchmarks.bench_llm --calls 300 --users 16 --limits 8 16 32 --tail-rate 0.05 --tail-latency 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+
+# Settings are read on first import; the fake server needs no real key
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+import httpx
+from langchain_groq import ChatGroq
+from llm_client import ResilientLLMCaller, create_http_clients
+
+async def wait_up(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/stats")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError("Fake LLM server did not start")
+
+async def run_mode(args, base_url: str, limit: int, hedge: bool) -> dict:
+    http_client, http_async_client = create_http_clients()
+    llm = ChatGroq(
+        api_key="offline-benchmark",
+        model_name="llama3-70b-8192",
+        base_url=base_url,
+        max_retries=args.retries,
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
+    caller = ResilientLLMCaller(
+        max_concurrency=limit,
+        hedge=hedge,
+        hedge_quantile=0.95,
+        hedge_min_delay=args.hedge_min_delay,
+        hedge_min_samples=20
+    )
+    latencies, outcomes = [], {"ok": 0, "timeout": 0, "error": 0}
+    remaining = iter(range(args.calls))
+
+    async def user():
+        for i in remaining:
+            started = time.monotonic()
+            try:
+                await caller.call(lambda: llm.ainvoke(f"Question {i}"), started + args.deadline)
+                latencies.append(1000 * (time.monotonic() - started))
+                outcomes["ok"] += 1
+            except asyncio.TimeoutError:
+                outcomes["timeout"] += 1
+            except Exception:
+                outcomes["error"] += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(user() for _ in range(args.users)))
+    elapsed = time.monotonic() - started
+    await http_async_client.aclose()
+    http_client.close()
+
+    stats = caller.stats()
+    return {
+        "limit": limit,
+        "hedge": hedge,
+        **outcomes,
+        "throughput_rps": round(outcomes["ok"] / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1) if latencies else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1) if latencies else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1) if latencies else None,
+        "hedges": stats["hedges"],
+        "hedge_rate": round(stats["hedges"] / stats["calls"], 3) if stats["calls"] else 0.0,
+        "hedge_wins": stats["hedge_wins"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8093)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--users", type=int, default=16, help="Simulated users, each with one call in flight")
+    parser.add_argument("--limits", type=int, nargs="+", default=[8, 16, 32], help="Provider concurrency limits to compare")
+    parser.add_argument("--deadline", type=float, default=10.0, help="Per-call deadline in seconds")
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--hedge-min-delay", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=3.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    base_url = f"http://localhost:{args.port}"
+    server = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_openai",
+        "--port", str(args.port),
+        "--latency", str(args.latency),
+        "--tail-rate", str(args.tail_rate),
+        "--tail-latency", str(args.tail_latency),
+        "--error-rate", str(args.error_rate)
+    ])
+    try:
+        asyncio.run(wait_up(base_url))
+        results = [
+            asyncio.run(run_mode(args, base_url, limit, hedge))
+            for limit in args.limits
+            for hedge in (False, True)
+        ]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'limit':>6} {'hedge':>6} {'ok':>5} {'timeout':>8} {'error':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hedges':>7} {'rate':>6} {'wins':>5}")
+    for r in results:
+        print(
+            f"{r['limit']:>6} {str(r['hedge']):>6} {r['ok']:>5} {r['timeout']:>8} {r['error']:>6} {r['throughput_rps']:>7} "
+            f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['hedges']:>7} {r['hedge_rate']:>6} {r['hedge_wins']:>5}"
+        )
+
+if __name__ == "__main__":
+    main()
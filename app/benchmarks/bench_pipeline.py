@@ -0,0 +1,193 @@
+"""End-to-end load benchmark of /process_voice with per-stage percentiles.
+
+Starts the fake-backed server (benchmarks.fake_server) unless --url points
+at a running one, then sends the synthetic audio corpus to /process_voice
+at a fixed concurrency. It reports throughput plus p50/p95/p99 for the
+client-observed latency and for every stage in the Server-Timing header.
+
+Results can be saved as a JSON baseline and later runs compared against it.
+The comparison exits non-zero when a stage's p50 or p95 grows, or
+throughput drops, by more than the tolerance.
+
+Run from the app directory:
+    python -m benchmarks.bench_pipeline --requests 200 --save benchmarks/baselines/fake.json
+    python -m benchmarks.bench_pipeline --requests 200 --compare benchmarks/baselines/fake.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List
+import httpx
+import numpy as np
+from benchmarks.audio_corpus import DEFAULT_DURATIONS, load_corpus
+from benchmarks.load_test import wait_ready
+
+# Differences below this many milliseconds are noise, whatever the ratio
+NOISE_FLOOR_MS = 2.0
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    stages = {}
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                stages[name] = float(value)
+    return stages
+
+def percentiles(values: List[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2)
+    }
+
+async def drive(client: httpx.AsyncClient, corpus: Dict[str, bytes], concurrency: int, requests: int) -> dict:
+    clips = itertools.cycle(corpus.items())
+    remaining = iter(range(requests))
+    samples: Dict[str, List[float]] = {}
+    statuses: Dict[int, int] = {}
+
+    async def user(index: int):
+        headers = {"X-Session-ID": f"bench-{index}", "Accept": "application/json"}
+        for _ in remaining:
+            name, wav = next(clips)
+            started = time.perf_counter()
+            response = await client.post(
+                "/process_voice",
+                files={"file": (f"{name}.wav", wav, "audio/wav")},
+                headers=headers
+            )
+            elapsed_ms = 1000 * (time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code != 200:
+                continue
+            samples.setdefault("client", []).append(elapsed_ms)
+            for stage, ms in parse_server_timing(response.headers.get("server-timing", "")).items():
+                samples.setdefault(stage, []).append(ms)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ok = statuses.get(200, 0)
+    return {
+        "requests": requests,
+        "ok": ok,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 3),
+        "stages": {stage: percentiles(values) for stage, values in sorted(samples.items())}
+    }
+
+def start_fake_server(args) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.fake_server", "--port", str(args.port)]
+    if args.real_stt:
+        command.append("--real-stt")
+    if args.caches:
+        command.append("--caches")
+    return subprocess.Popen(command)
+
+async def run(args) -> dict:
+    corpus = load_corpus(args.corpus, args.durations, args.speech)
+    if not corpus:
+        raise SystemExit("Audio corpus is empty")
+
+    server = None if args.url else start_fake_server(args)
+    base_url = args.url or f"http://localhost:{args.port}"
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+            await wait_ready(client, 1, args.startup_timeout)
+            # Warm-up pass so one-time costs don't land in the percentiles
+            await drive(client, corpus, min(args.concurrency, len(corpus)), len(corpus))
+            result = await drive(client, corpus, args.concurrency, args.requests)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    result["config"] = {
+        "target": args.url or "fake_server",
+        "real_stt": args.real_stt,
+        "caches": args.caches,
+        "concurrency": args.concurrency,
+        "clips": sorted(corpus),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count()
+    }
+    return result
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Describe every metric that regressed beyond the tolerance"""
+    regressions = []
+    if result["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {baseline['throughput_rps']} -> {result['throughput_rps']} req/s")
+    for stage, before in baseline["stages"].items():
+        after = result["stages"].get(stage)
+        if after is None:
+            regressions.append(f"{stage}: missing from this run")
+            continue
+        for key in ("p50", "p95"):
+            if after[key] > before[key] * (1 + tolerance) + NOISE_FLOOR_MS:
+                regressions.append(f"{stage} {key} {before[key]} -> {after[key]} ms")
+    return regressions
+
+def print_report(result: dict, baseline: dict = None):
+    print(f"{result['ok']}/{result['requests']} ok in {result['elapsed_seconds']}s, {result['throughput_rps']} req/s")
+    print(f"{'stage':>16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'base p95':>9}")
+    for stage, r in result["stages"].items():
+        base = baseline["stages"].get(stage, {}).get("p95", "-") if baseline else "-"
+        print(f"{stage:>16} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f} {base:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Benchmark a running server instead of starting the fake one")
+    parser.add_argument("--port", type=int, default=8092)
+    parser.add_argument("--real-stt", action="store_true", help="Fake server uses the configured STT backend")
+    parser.add_argument("--caches", action="store_true", help="Fake server keeps the TTS, transcript, semantic and embedding caches")
+    parser.add_argument("--corpus", help="Directory of WAV clips; synthesized when omitted")
+    parser.add_argument("--durations", type=float, nargs="+", default=list(DEFAULT_DURATIONS))
+    parser.add_argument("--speech", action="store_true", help="Synthesize the corpus with espeak-ng")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--save", help="Write the results to this JSON baseline")
+    parser.add_argument("--compare", help="Compare against this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Local OpenAI-compatible chat completions server with injectable faults.
+
+Serves POST /openai/v1/chat/completions (the path the Groq client uses) with
+canned replies, plain or streamed. Every request waits a base latency plus
+jitter; a fraction of requests hit a slow tail, and a fraction fail with a
+configurable status. Point the app at it with GROQ_BASE_URL.
+
+Run from the app directory:
+    python -m benchmarks.fake_openai --port 8093 --latency 0.3 --tail-rate 0.05 --tail-latency 3 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY = (
+    "I built ReguLens to make regulatory documents searchable with a retrieval pipeline. "
+    "The hardest part was keeping latency low while the corpus kept growing."
+)
+
+class FaultProfile:
+    def __init__(self, latency: float = 0.3, jitter: float = 0.05, tail_rate: float = 0.0, tail_latency: float = 3.0,
+                 error_rate: float = 0.0, error_status: int = 500, token_delay: float = 0.005):
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_delay = token_delay
+
+    def delay(self) -> float:
+        if random.random() < self.tail_rate:
+            return self.tail_latency
+        return max(0.0, random.gauss(self.latency, self.jitter))
+
+def create_app(profile: FaultProfile) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI-compatible LLM")
+    counts = {"requests": 0, "errors": 0, "tail": 0}
+
+    @app.get("/stats")
+    async def stats():
+        return counts
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counts["requests"] += 1
+        delay = profile.delay()
+        counts["tail"] += delay == profile.tail_latency
+        await asyncio.sleep(delay)
+
+        if random.random() < profile.error_rate:
+            counts["errors"] += 1
+            return JSONResponse(
+                content={"error": {"message": "Injected failure", "type": "server_error"}},
+                status_code=profile.error_status
+            )
+
+        question = body["messages"][-1].get("content", "") if body.get("messages") else ""
+        words = f"{REPLY} You asked: {question}".split(" ")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake")
+        usage = {
+            "prompt_tokens": sum(len(str(m.get("content", "")).split()) for m in body.get("messages", [])),
+            "completion_tokens": len(words)
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not body.get("stream"):
+            await asyncio.sleep(profile.token_delay * len(words))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+                "usage": usage
+            }
+
+        async def stream():
+            for i, word in enumerate(words):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word if i == 0 else f" {word}"}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(profile.token_delay)
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"usage": usage}
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8093)
+    parser.add_argument("--latency", type=float, default=0.3, help="Mean seconds before responding")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Standard deviation of the latency")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of requests that are slow")
+    parser.add_argument("--tail-latency", type=float, default=3.0, help="Seconds a slow request takes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Seconds per generated token")
+    args = parser.parse_args()
+
+    profile = FaultProfile(
+        latency=args.latency,
+        jitter=args.jitter,
+        tail_rate=args.tail_rate,
+        tail_latency=args.tail_latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        token_delay=args.token_delay
+    )
+    uvicorn.run(create_app(profile), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
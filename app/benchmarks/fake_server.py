@@ -0,0 +1,68 @@
+"""Serve the app with fake Groq, vector store and TTS for offline benchmarks.
+
+Whisper is faked too unless --real-stt is given. The TTS, transcript,
+semantic and embedding caches are disabled by default so every request exercises every stage; pass
+--caches to measure with them.
+
+Run from the app directory:
+    python -m benchmarks.fake_server --port 8092 --llm-first-token 0.4
+"""
+import argparse
+import os
+
+# Server settings that make every request miss the caches; shared with load_test
+CACHES_OFF = {
+    "TRANSCRIPT_CACHE_SIZE": "0",
+    "SEMANTIC_CACHE_ENABLED": "false",
+    "EMBEDDING_QUERY_CACHE_SIZE": "0",
+    "TTS_CACHE_MEMORY_BYTES": "0",
+    "TTS_CACHE_DIR": ""
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8092)
+    parser.add_argument("--real-stt", action="store_true", help="Use the configured STT backend instead of the fake")
+    parser.add_argument("--caches", action="store_true", help="Keep the TTS, transcript, semantic and embedding caches enabled")
+    parser.add_argument("--stt-rtf", type=float, default=0.1, help="Fake STT seconds per second of audio")
+    parser.add_argument("--llm-first-token", type=float, default=0.4, help="Fake LLM delay before the first token")
+    parser.add_argument("--llm-token", type=float, default=0.01, help="Fake LLM delay per token")
+    parser.add_argument("--retrieval-latency", type=float, default=0.05, help="Fake vector search round trip")
+    parser.add_argument("--tts-per-char", type=float, default=0.002, help="Fake TTS seconds per character")
+    return parser.parse_args(argv)
+
+def build_loader(args):
+    from config.setting import Config
+    from startup import PipelineLoader
+    from llm_service import LLMService
+    from benchmarks.fakes import FakeChatModel, FakeSTTBackend, FakeTTSEngine, FakeVectorStoreService
+
+    sources = [pattern.strip() for pattern in Config.corpus_sources.split(",") if pattern.strip()]
+    factories = {
+        "tts": lambda: FakeTTSEngine(seconds_per_char=args.tts_per_char),
+        "llm": lambda: LLMService(
+            llm=FakeChatModel(first_token_seconds=args.llm_first_token, token_seconds=args.llm_token),
+            vector_store_service=FakeVectorStoreService(sources, latency=args.retrieval_latency)
+        ),
+    }
+    if not args.real_stt:
+        factories["stt"] = lambda: FakeSTTBackend(real_time_factor=args.stt_rtf)
+    return PipelineLoader(factories)
+
+def main():
+    args = parse_args()
+
+    # Settings are read on first import, so override them before that
+    os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+    if not args.caches:
+        os.environ.update(CACHES_OFF)
+
+    import uvicorn
+    import main as app_main
+
+    app_main.pipeline_loader = build_loader(args)
+    uvicorn.run(app_main.app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
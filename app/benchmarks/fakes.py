@@ -0,0 +1,169 @@
+"""Local stand-ins for Groq, the vector store, TTS and (optionally) Whisper.
+
+Each fake has a configurable, deterministic latency so the pipeline can be
+benchmarked offline and results stay comparable between runs. They plug into
+the same seams as the real components: the LLM and vector store service are
+passed to LLMService, the engines to PipelineLoader.
+"""
+import hashlib
+import time
+from typing import Any, Iterator, List, Optional
+import numpy as np
+from pydantic import ConfigDict
+from langchain_core.callbacks import CallbackManagerForLLMRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.retrievers import BaseRetriever
+from ingestion import CorpusIngestor
+from metrics import timed
+from stt_backends import STTBackend, STT_SAMPLE_RATE
+from tts_engines import TTSEngine
+from benchmarks.audio_corpus import QUERIES
+
+CANNED_ANSWER = (
+    "I built ReguLens to make regulatory documents searchable with a retrieval pipeline. "
+    "It chunks filings, embeds them with a small sentence transformer and serves answers through an LLM. "
+    "The hardest part was keeping latency low while the corpus kept growing. "
+    "I solved that with incremental ingestion and caching at every stage."
+)
+
+CANNED_CHUNKS = [
+    "ReguLens is a retrieval augmented assistant for regulatory documents built with LangChain and Pinecone.",
+    "FocusForge is a productivity tool that uses AI to plan focused work sessions.",
+    "IKIGAI Compass helps students explore career paths through guided conversations.",
+    "Harshil was a member of the GDSC Data Science core team and mentored juniors in machine learning.",
+    "Current learning areas include LLMOps, model deployment and multi-agent systems with LangGraph.",
+    "Harshil graduated with an 8.72 CGPA and taught himself deep learning through hands-on projects.",
+]
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers with canned text after a fixed delay"""
+
+    answer: str = CANNED_ANSWER
+    first_token_seconds: float = 0.4
+    token_seconds: float = 0.01
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        # Echo the question so replies differ between queries
+        return f"{self.answer} You asked: {messages[-1].content}"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        reply = self._reply(messages)
+        time.sleep(self.first_token_seconds + self.token_seconds * len(reply.split()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_seconds)
+        for i, word in enumerate(self._reply(messages).split(" ")):
+            if i:
+                time.sleep(self.token_seconds)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else f" {word}"))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hash-seeded vectors with a fixed encode delay"""
+
+    def __init__(self, dimension: int = 384, latency: float = 0.005):
+        self.dimension = dimension
+        self.latency = latency
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        with timed("embedding"):
+            time.sleep(self.latency)
+            return self._vector(text)
+
+class FakeRetriever(BaseRetriever):
+    """Exact search over in-memory chunks plus a fixed round-trip delay"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    embeddings: Any
+    texts: List[str]
+    vectors: Any
+    latency: float = 0.05
+    k: int = 3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        scores = self.vectors @ np.asarray(self.embeddings.embed_query(query))
+        time.sleep(self.latency)
+        top = np.argsort(-scores)[:self.k]
+        return [Document(page_content=self.texts[i], metadata={"score": float(scores[i])}) for i in top]
+
+class FakeVectorStoreService:
+    """Stands in for VectorStoreService: same embeddings, corpus_version and get_retriever"""
+
+    def __init__(self, sources: List[str], latency: float = 0.05):
+        self.embeddings = FakeEmbeddings()
+        ingestor = CorpusIngestor(None, sources, manifest_path="", batch_size=0, upsert_workers=1)
+        self.texts = [text for _, text in ingestor.collect_chunks().values()] or list(CANNED_CHUNKS)
+        self.vectors = np.asarray(self.embeddings.embed_documents(self.texts), dtype=np.float32)
+        self.latency = latency
+        self.corpus_version = "fake"
+
+    def get_retriever(self):
+        return FakeRetriever(
+            embeddings=self.embeddings,
+            texts=self.texts,
+            vectors=self.vectors,
+            latency=self.latency
+        )
+
+class FakeTTSEngine(TTSEngine):
+    """Tone "speech" at a realistic speaking rate with a per-character delay"""
+
+    name = "fake"
+
+    def __init__(self, seconds_per_char: float = 0.002, sample_rate: int = 22050, chars_per_second: float = 14.0):
+        self.seconds_per_char = seconds_per_char
+        self.sample_rate = sample_rate
+        self.chars_per_second = chars_per_second
+
+    def synthesize(self, text: str):
+        time.sleep(self.seconds_per_char * len(text))
+        duration = max(len(text) / self.chars_per_second, 0.2)
+        t = np.arange(int(duration * self.sample_rate), dtype=np.float32) / self.sample_rate
+        return (0.2 * np.sin(2 * np.pi * 180 * t)).astype(np.float32), self.sample_rate
+
+class FakeSTTBackend(STTBackend):
+    """Returns one of the benchmark queries after a delay proportional to the audio"""
+
+    name = "fake"
+
+    def __init__(self, real_time_factor: float = 0.1):
+        super().__init__()
+        self.real_time_factor = real_time_factor
+
+    def _transcribe(self, audio: np.ndarray) -> str:
+        time.sleep(self.real_time_factor * len(audio) / STT_SAMPLE_RATE)
+        return QUERIES[len(audio) % len(QUERIES)]
@@ -0,0 +1,149 @@
+"""Throughput and memory of serve.py as the worker count grows.
+
+For each worker count this starts `serve.py`, waits for every worker to be
+ready, drives POST /process_voice at a fixed concurrency, and reports
+requests/sec along with RSS and PSS per worker (PSS splits shared pages
+between the processes mapping them, so it shows what copy-on-write sharing
+actually saves compared to RSS).
+
+Every request uploads a different speech-like clip, and the transcript,
+semantic, embedding and TTS caches are turned off in the server, so each
+request pays for the full pipeline. Pass --caches to measure with the
+caches on, as with fake_server and bench_pipeline.
+
+Run from the app directory (settings are read from .env as usual):
+    python -m benchmarks.load_test --workers 1 2 4 --concurrency 8 --duration 30
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import httpx
+import numpy as np
+from benchmarks.audio_corpus import speech_like, to_wav
+from benchmarks.fake_server import CACHES_OFF
+
+def child_pids(pid: int):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+def memory_kb(pid: int) -> dict:
+    """RSS and PSS of a process in kB, from /proc/<pid>/smaps_rollup"""
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                usage[key.lower()] = int(value.split()[0])
+    return usage
+
+async def wait_ready(client: httpx.AsyncClient, workers: int, timeout: float):
+    """Poll /ready until enough consecutive hits succeed to cover every worker"""
+    deadline = time.monotonic() + timeout
+    ready = 0
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/ready")
+            ready = ready + 1 if response.status_code == 200 else 0
+        except httpx.TransportError:
+            ready = 0
+        if ready >= 4 * workers:
+            return
+        await asyncio.sleep(0.25)
+    raise TimeoutError("Server did not become ready in time")
+
+async def drive(client: httpx.AsyncClient, seconds: float, concurrency: int, duration: float) -> dict:
+    latencies, statuses = [], {}
+    deadline = time.monotonic() + duration
+    seeds = itertools.count()
+
+    async def user(index: int):
+        headers = {"X-Session-ID": f"load-{index}", "Accept": "application/json"}
+        while time.monotonic() < deadline:
+            audio = to_wav(speech_like(seconds, seed=next(seeds)))
+            started = time.perf_counter()
+            response = await client.post(
+                "/process_voice",
+                files={"file": ("query.wav", audio, "audio/wav")},
+                headers=headers
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    elapsed = time.monotonic() - started
+    return {
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": 1000 * float(np.percentile(latencies, 50)) if latencies else None,
+        "p95_ms": 1000 * float(np.percentile(latencies, 95)) if latencies else None,
+        "statuses": statuses
+    }
+
+async def run_level(workers: int, args) -> dict:
+    env = {**os.environ, "SESSION_BACKEND": "sqlite"}
+    if not args.caches:
+        env.update(CACHES_OFF)
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--port", str(args.port), "--log-level", "warning"],
+        env=env
+    )
+    try:
+        base_url = f"http://localhost:{args.port}"
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+            await wait_ready(client, workers, args.startup_timeout)
+            result = await drive(client, args.clip_seconds, args.concurrency, args.duration)
+
+        usage = [memory_kb(pid) for pid in child_pids(server.pid)]
+        master = memory_kb(server.pid)
+        result.update({
+            "workers": workers,
+            "master_rss_mb": round(master["rss"] / 1024, 1),
+            "worker_rss_mb": round(sum(u["rss"] for u in usage) / max(len(usage), 1) / 1024, 1),
+            "worker_pss_mb": round(sum(u["pss"] for u in usage) / max(len(usage), 1) / 1024, 1),
+            "total_pss_mb": round((master["pss"] + sum(u["pss"] for u in usage)) / 1024, 1)
+        })
+        return result
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--clip-seconds", type=float, default=3.0)
+    parser.add_argument("--caches", action="store_true", help="Keep the TTS, transcript, semantic and embedding caches enabled")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = [asyncio.run(run_level(workers, args)) for workers in args.workers]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'RSS/w MB':>9} {'PSS/w MB':>9} {'PSS tot':>8}")
+    for r in results:
+        p50 = f"{r['p50_ms']:.0f}" if r["p50_ms"] is not None else "-"
+        p95 = f"{r['p95_ms']:.0f}" if r["p95_ms"] is not None else "-"
+        print(
+            f"{r['workers']:>7} {r['requests_per_sec']:>8.2f} {p50:>8} {p95:>8} "
+            f"{r['worker_rss_mb']:>9.1f} {r['worker_pss_mb']:>9.1f} {r['total_pss_mb']:>8.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,155 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import threading
+from typing import Callable, Optional
+from config.setting import Config
+
+# Pass as `extra=PAYLOAD` on records that carry user text or LLM output
+PAYLOAD = {"payload": True}
+
+# Returns the current request id, or None outside a request; installed by the app
+_request_id_getter: Callable[[], Optional[str]] = lambda: None
+
+def set_request_id_getter(getter: Callable[[], Optional[str]]):
+    """Let records carry the request id without config depending on the app"""
+    global _request_id_getter
+    _request_id_getter = getter
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request id and samples payload records.
+
+    Runs on the caller's thread, where the request context is visible, so it
+    only does attribute lookups; formatting happens on the listener thread.
+    """
+
+    def __init__(self, payload_sample_rate: float):
+        super().__init__()
+        self.payload_sample_rate = payload_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "payload", False) and self.payload_sample_rate < 1.0:
+            if random.random() >= self.payload_sample_rate:
+                return False
+        record.request_id = _request_id_getter() or "-"
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener without formatting them, dropping when full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue stays in-process, so the record needs no pickling-safe copy
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class PayloadFormatter(logging.Formatter):
+    """Formats on the listener thread, truncating long payload messages"""
+
+    def __init__(self, fmt: str, max_chars: int, as_json: bool):
+        super().__init__(fmt)
+        self.max_chars = max_chars
+        self.as_json = as_json
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "payload", False) and self.max_chars:
+            message = record.getMessage()
+            if len(message) > self.max_chars:
+                record = logging.makeLogRecord({
+                    **record.__dict__,
+                    "msg": f"{message[:self.max_chars]}... [{len(message)} chars]",
+                    "args": None
+                })
+        if not self.as_json:
+            return super().format(record)
+
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "request_id": getattr(record, "request_id", "-"),
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+def _file_handler(log_file: str) -> logging.Handler:
+    if Config.log_rotation.lower() == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when=Config.log_rotate_when, backupCount=Config.log_backup_count
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=Config.log_max_bytes, backupCount=Config.log_backup_count
+        )
+    handler.setFormatter(PayloadFormatter(
+        '%(asctime)s - %(levelname)s - %(request_id)s - %(message)s',
+        max_chars=Config.log_payload_max_chars,
+        as_json=Config.log_format.lower() == "json"
+    ))
+    return handler
+
+class _QueueLogging:
+    """Queue in front of the file handler, drained by a QueueListener thread.
+
+    Forked workers (serve.py) get a fresh queue and listener, since the
+    parent's listener thread does not survive the fork, and write to their
+    own pid-suffixed file so they never rotate the same file concurrently.
+    """
+
+    def __init__(self, log_dir: str):
+        self.log_dir = log_dir
+        self.handler = DroppingQueueHandler(queue.Queue(maxsize=Config.log_queue_size))
+        self.handler.addFilter(RequestContextFilter(Config.log_payload_sample_rate))
+        self.listener = None
+        self._lock = threading.Lock()
+        self.start(os.path.join(log_dir, 'app.log'))
+
+    def start(self, log_file: str):
+        with self._lock:
+            self.listener = logging.handlers.QueueListener(self.handler.queue, _file_handler(log_file))
+            self.listener.start()
+
+    def stop(self):
+        with self._lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+        self.handler.queue = queue.Queue(maxsize=Config.log_queue_size)
+        self.start(os.path.join(self.log_dir, f'app.{os.getpid()}.log'))
 
 def setup_logger():
     logger = logging.getLogger(__name__)
-    logger.setLevel(logging.DEBUG)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    logger.setLevel(Config.log_level.upper())
 
     # Ensure logs directory exists
-    log_dir = 'logs'
+    log_dir = Config.log_dir
     os.makedirs(log_dir, exist_ok=True)
 
-    # Set up file handler
-    log_file = os.path.join(log_dir, 'app.log')
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
-
     # Add handler only if not already present
     if not logger.hasHandlers():
-        logger.addHandler(file_handler)
-    
+        queue_logging = _QueueLogging(log_dir)
+        logger.addHandler(queue_logging.handler)
+        atexit.register(queue_logging.stop)
+        os.register_at_fork(after_in_child=queue_logging.after_fork)
+
     return logger
 
 # Initiate the logger instance
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
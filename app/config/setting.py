@@ -4,8 +4,144 @@ class Settings(BaseSettings):
     
     groq_api_key: str
 
-    pinecone_api_key: str
-    pinecone_index: str 
+    pinecone_api_key: str = ""
+    pinecone_index: str = ""
+    
+    # Retrieval backend: pinecone or local (memory-mapped NumPy index)
+    vector_backend: str = "pinecone"
+    local_index_dir: str = "data/index"
+    
+    # Embedding runtime: torch, int8 or onnx
+    embedding_runtime: str = "torch"
+    embedding_batch_size: int = 32
+    embedding_query_cache_size: int = 1024
+    embedding_onnx_file: str = ""
+    
+    # Corpus ingestion: comma-separated source globs and batching
+    corpus_sources: str = "data/*.txt"
+    ingest_manifest_path: str = ""  # empty: one manifest per backend and index, see ingestion.manifest_path_for
+    embed_batch_size: int = 64
+    upsert_workers: int = 4
+    
+    # Multi-process serving (serve.py)
+    serve_workers: int = 1
+    
+    # Pipeline worker pool and admission queue
+    pipeline_workers: int = 2
+    pipeline_queue_size: int = 8
+    pipeline_retry_after: int = 5
+    
+    # Pipeline model loading: attempts before /health reports failure, first backoff
+    pipeline_load_attempts: int = 3
+    pipeline_load_backoff_seconds: float = 5.0
+    
+    # Per-session conversation memory: memory (per process) or sqlite (shared by workers)
+    session_backend: str = "memory"
+    session_db_path: str = "data/sessions.db"
+    session_max_sessions: int = 5000
+    session_max_turns: int = 10
+    session_max_bytes: int = 64 * 1024 * 1024
+    session_ttl_seconds: int = 1800
+    
+    # LLM provider calls: pooled client, deadlines, concurrency limit and hedging
+    groq_base_url: str = ""  # e.g. http://localhost:8093 for benchmarks.fake_openai
+    llm_async: bool = True
+    llm_timeout_seconds: float = 30.0
+    llm_max_retries: int = 1
+    llm_max_connections: int = 32
+    llm_max_concurrency: int = 16
+    request_budget_seconds: float = 30.0
+    llm_deadline_reserve_seconds: float = 5.0  # kept for TTS after the LLM call
+    llm_hedge_enabled: bool = False
+    llm_hedge_quantile: float = 0.95
+    llm_hedge_min_delay_ms: int = 500
+    llm_hedge_min_samples: int = 20
+    
+    # Retrieval policy: skip small talk, reuse context for close follow-ups, merge overlapping chunks
+    retrieval_policy_enabled: bool = True
+    retrieval_reuse_threshold: float = 0.85
+    retrieval_extend_threshold: float = 0.6
+    chunk_merge_min_overlap: int = 20
+    
+    # Prompt memory: window (last N turns verbatim) or budget (token budget plus running summary)
+    memory_mode: str = "window"
+    prompt_token_budget: int = 3000
+    context_token_budget: int = 1500
+    summary_model: str = "llama3-8b-8192"
+    summary_trigger_tokens: int = 800
+    summary_keep_turns: int = 2
+    summary_max_words: int = 120
+    summary_max_tokens: int = 256
+    
+    # Upload limits for the audio ingest stage
+    max_upload_bytes: int = 10 * 1024 * 1024
+    max_audio_seconds: float = 120.0
+    
+    # Voice activity detection ahead of Whisper
+    vad_enabled: bool = True
+    vad_margin_db: float = 12.0
+    vad_speech_level_db: float = -35.0  # frames this loud always count as speech
+    vad_padding_ms: int = 200
+    vad_max_pause_ms: int = 500
+    
+    # Speech-to-text backend: whisper or faster-whisper
+    stt_backend: str = "whisper"
+    whisper_model_size: str = "base"
+    stt_threads: int = 0  # 0 uses the library default
+    stt_compute_type: str = "int8"
+    stt_warmup: bool = True
+    
+    # Whisper micro-batching across concurrent requests (whisper backend)
+    whisper_batching: bool = True
+    whisper_max_batch_size: int = 8
+    whisper_max_wait_ms: int = 20
+    
+    # Text-to-speech engine: gtts, espeak or piper
+    tts_engine: str = "gtts"
+    tts_voice: str = "en"
+    tts_speed: int = 175
+    tts_workers: int = 4
+    espeak_binary: str = "espeak-ng"
+    piper_binary: str = "piper"
+    piper_model: str = ""
+    tts_output_sample_rate: int = 0  # 0 keeps the engine's native rate
+    
+    # Synthesized speech cache
+    tts_cache_memory_bytes: int = 32 * 1024 * 1024
+    tts_cache_dir: str = ".cache/tts"
+    tts_cache_disk_bytes: int = 256 * 1024 * 1024
+    
+    # Semantic answer cache for first-turn questions
+    semantic_cache_enabled: bool = True
+    semantic_cache_size: int = 512
+    semantic_cache_threshold: float = 0.92
+    
+    # Transcripts keyed by decoded PCM, so retried uploads skip Whisper
+    transcript_cache_size: int = 256
+    
+    # Replays of /process_voice requests sent with an Idempotency-Key header
+    idempotency_ttl_seconds: int = 600
+    idempotency_max_entries: int = 1024
+    idempotency_max_bytes: int = 64 * 1024 * 1024
+    
+    # Streaming transcription over /ws/voice
+    stream_window_seconds: float = 20.0
+    stream_step_seconds: float = 1.0
+    stream_pause_ms: int = 400
+    stream_endpoint_ms: int = 500
+    stream_silence_rms: float = 0.01
+    
+    # Logging: queued writes on a background thread with rotation
+    log_level: str = "INFO"
+    log_dir: str = "logs"
+    log_format: str = "text"  # text or json
+    log_rotation: str = "size"  # size or time
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_rotate_when: str = "midnight"
+    log_backup_count: int = 5
+    log_queue_size: int = 10000
+    log_payload_max_chars: int = 500  # 0 logs payloads in full
+    log_payload_sample_rate: float = 1.0
     
     model_config= SettingsConfigDict(
         env_file=".env",
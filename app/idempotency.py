@@ -0,0 +1,89 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+class IdempotencyCache:
+    """Results of recent requests by idempotency key, replayed to retries.
+
+    A retry that arrives while the original is still running awaits the
+    same task, so the pipeline runs (and saves the memory turn) once. The
+    task is shielded from the original request's cancellation so a retry
+    can still pick up its result. Only results accepted by `keep` are
+    stored; entries expire after `ttl_seconds` and the least recently used
+    ones are evicted beyond `max_entries` or `max_bytes`.
+
+    Lives on the event loop of one process; workers started by serve.py
+    each keep their own.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._bytes = 0
+        self._counts = {"stored": 0, "replayed": 0, "joined": 0, "evicted": 0}
+
+    def _lookup(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key: str, value, size: int):
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._bytes += size
+        self._counts["stored"] += 1
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self._counts["evicted"] += 1
+
+    async def run(self, key: str, compute: Callable[[], Awaitable], size: Callable[[Any], int],
+                  keep: Callable[[Any], bool] = lambda value: True) -> Tuple[Any, bool]:
+        """Return (result, replayed), running `compute()` only for a new key"""
+        entry = self._lookup(key)
+        if entry is not None:
+            self._counts["replayed"] += 1
+            return entry[2], True
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self._counts["joined"] += 1
+            return await asyncio.shield(pending), True
+
+        task = asyncio.ensure_future(compute())
+        self._pending[key] = task
+
+        def settle(done: asyncio.Future):
+            self._pending.pop(key, None)
+            if done.cancelled() or done.exception() is not None:
+                return
+            value = done.result()
+            if keep(value):
+                self._store(key, value, size(value))
+
+        task.add_done_callback(settle)
+        return await asyncio.shield(task), False
+
+    def stats(self) -> dict:
+        return {
+            **self._counts,
+            "entries": len(self._entries),
+            "pending": len(self._pending),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
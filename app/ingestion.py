@@ -0,0 +1,142 @@
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from config.setting import Config
+from config.logging import logger
+
+def chunk_id(text: str) -> str:
+    """Content-hash id, stable no matter where the chunk sits in its file"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+def manifest_version(chunk_ids) -> str:
+    """Digest of the indexed chunk set, used as the corpus version"""
+    digest = hashlib.sha256("\n".join(sorted(chunk_ids)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def manifest_path_for(backend: str) -> str:
+    """Manifest location for a backend and index, so each index tracks what it holds.
+
+    The local index keeps it next to its files; each Pinecone index gets its
+    own file named after the index. `ingest_manifest_path` overrides both.
+    """
+    if Config.ingest_manifest_path:
+        return Config.ingest_manifest_path
+    if backend == "local":
+        return os.path.join(Config.local_index_dir, "manifest.json")
+    return os.path.join("data", "manifests", f"pinecone-{Config.pinecone_index or 'default'}.json")
+
+def read_manifest(path: str) -> Dict[str, str]:
+    """Map of indexed chunk id -> source file, empty if nothing was ingested yet"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)["chunks"]
+    except FileNotFoundError:
+        return {}
+
+class CorpusIngestor:
+    """Incremental ingestion of the source files into the vector store.
+
+    Chunks are identified by a hash of their content and a local manifest
+    records what is already indexed, so a run only embeds and upserts new or
+    changed chunks and deletes the ones that disappeared. Embeddings are
+    computed in fixed-size batches and upserted on a small thread pool with
+    a bounded number of batches in flight, which keeps memory flat.
+    """
+
+    def __init__(self, vector_store_service, sources: List[str], manifest_path: str, batch_size: int, upsert_workers: int):
+        self.vector_store_service = vector_store_service
+        self.sources = sources
+        self.manifest_path = manifest_path
+        self.batch_size = batch_size
+        self.upsert_workers = upsert_workers
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=500,    # Larger chunks for better context
+            chunk_overlap=50, # More overlap for continuity
+            length_function=len
+        )
+
+    def source_files(self) -> List[str]:
+        files = set()
+        for pattern in self.sources:
+            files.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+        return sorted(files)
+
+    def collect_chunks(self) -> Dict[str, Tuple[str, str]]:
+        """Map of chunk id -> (source file, text) for the current sources"""
+        chunks = {}
+        for path in self.source_files():
+            with open(path, "r") as f:
+                text = f.read()
+            for chunk in self.splitter.split_text(text):
+                chunks.setdefault(chunk_id(chunk), (path, chunk))
+        return chunks
+
+    def write_manifest(self, chunks: Dict[str, str]):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": manifest_version(chunks), "chunks": chunks}, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def run(self) -> dict:
+        indexed = read_manifest(self.manifest_path)
+        current = self.collect_chunks()
+
+        added = [cid for cid in current if cid not in indexed]
+        removed = [cid for cid in indexed if cid not in current]
+        logger.info(
+            f"Ingestion plan: {len(current)} chunks from {len(self.source_files())} files, "
+            f"{len(added)} new, {len(removed)} removed, {len(current) - len(added)} unchanged"
+        )
+
+        store = self.vector_store_service
+        if not indexed:
+            store.reset_index()
+
+        max_in_flight = 2 * self.upsert_workers
+        with ThreadPoolExecutor(max_workers=self.upsert_workers, thread_name_prefix="upsert") as pool:
+            in_flight = deque()
+            for start in range(0, len(added), self.batch_size):
+                batch_ids = added[start:start + self.batch_size]
+                batch_texts = [current[cid][1] for cid in batch_ids]
+                vectors = np.asarray(store.embeddings.embed_documents(batch_texts), dtype=np.float32)
+                in_flight.append(pool.submit(store.upsert_chunks, batch_ids, batch_texts, vectors))
+                # Bound embedded-but-not-yet-upserted batches held in memory
+                while len(in_flight) >= max_in_flight:
+                    in_flight.popleft().result()
+            while in_flight:
+                in_flight.popleft().result()
+
+        if removed:
+            store.delete_chunks(removed)
+        store.commit_chunks()
+
+        manifest = {cid: source for cid, (source, _) in current.items()}
+        # The store picks up the new corpus version from the rewritten manifest
+        self.write_manifest(manifest)
+
+        return {"chunks": len(current), "added": len(added), "removed": len(removed)}
+
+def ingest_corpus(vector_store_service) -> dict:
+    """Run an incremental ingestion with the configured sources"""
+    ingestor = CorpusIngestor(
+        vector_store_service,
+        sources=[pattern.strip() for pattern in Config.corpus_sources.split(",") if pattern.strip()],
+        manifest_path=vector_store_service.manifest_path,
+        batch_size=Config.embed_batch_size,
+        upsert_workers=Config.upsert_workers
+    )
+    return ingestor.run()
+
+if __name__ == "__main__":
+    from vector_store import VectorStoreService
+
+    result = ingest_corpus(VectorStoreService())
+    logger.info(f"Ingestion finished: {result}")
+    print(result)
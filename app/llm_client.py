@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+import httpx
+import numpy as np
+from config.setting import Config
+from config.logging import logger
+
+def create_http_clients():
+    """One pooled sync and one pooled async HTTP client for the LLM provider"""
+    limits = httpx.Limits(
+        max_connections=Config.llm_max_connections,
+        max_keepalive_connections=Config.llm_max_connections,
+        keepalive_expiry=60.0
+    )
+    timeout = httpx.Timeout(Config.llm_timeout_seconds, connect=5.0)
+    return httpx.Client(limits=limits, timeout=timeout), httpx.AsyncClient(limits=limits, timeout=timeout)
+
+class LatencyWindow:
+    """Rolling window of recent call latencies"""
+
+    def __init__(self, size: int = 256):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples)
+        return float(np.quantile(samples, q)) if samples else None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class ResilientLLMCaller:
+    """Deadline-bound, concurrency-limited async calls to the LLM provider.
+
+    At most `max_concurrency` calls are in flight to the provider; waiting
+    for a slot counts against the caller's deadline. With hedging enabled, a
+    call still running after the recent p95 latency gets a second attempt
+    and whichever finishes first wins. Hedges are only sent while a slot is
+    free, so they never add queueing under saturation.
+    """
+
+    def __init__(self, max_concurrency: int, hedge: bool, hedge_quantile: float, hedge_min_delay: float, hedge_min_samples: int):
+        self.max_concurrency = max_concurrency
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyWindow()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._counts = {"calls": 0, "timeouts": 0, "errors": 0, "hedges": 0, "hedge_wins": 0}
+        self._in_flight = 0
+
+    def _count(self, key: str):
+        self._counts[key] += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.latency) < self.hedge_min_samples:
+            return None
+        return max(self.latency.quantile(self.hedge_quantile), self.hedge_min_delay)
+
+    async def _attempt(self, make_call: Callable[[], Awaitable]):
+        async with self._semaphore:
+            self._in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = await make_call()
+            finally:
+                self._in_flight -= 1
+            self.latency.add(time.perf_counter() - started)
+            return result
+
+    async def call(self, make_call: Callable[[], Awaitable], deadline: float):
+        """Await `make_call()` until `deadline` (time.monotonic), hedging if enabled.
+
+        Raises asyncio.TimeoutError when the deadline passes first.
+        """
+        self._count("calls")
+        tasks = set()
+        try:
+            primary = asyncio.ensure_future(self._attempt(make_call))
+            tasks.add(primary)
+
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=min(delay, max(deadline - time.monotonic(), 0)))
+                if not done and not self._semaphore.locked() and deadline > time.monotonic():
+                    tasks.add(asyncio.ensure_future(self._attempt(make_call)))
+                    self._count("hedges")
+
+            error = None
+            while tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, tasks = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            if error is None:
+                raise asyncio.TimeoutError()
+            raise error
+
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            logger.warning("LLM call exceeded its deadline")
+            raise
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        p50 = self.latency.quantile(0.5)
+        p95 = self.latency.quantile(0.95)
+        return {
+            **self._counts,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+            "hedge_delay_seconds": self.hedge_delay()
+        }
@@ -1,30 +1,86 @@
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
-from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.memory import ConversationBufferWindowMemory
 from langchain.chains import ConversationChain
 from vector_store import VectorStoreService
+from session_store import create_session_store, format_history
+from semantic_cache import SemanticCache
+from memory_summarizer import MemorySummarizer
+from token_budget import TokenAccounting, count_tokens, fit_prompt
+from retrieval_policy import RetrievalPolicy
+from request_context import current_request
+from metrics import observe_stage, timed
+from llm_client import ResilientLLMCaller, create_http_clients
+import asyncio
+import time
 from config.setting import Config
-from config.logging import logger
+from config.logging import logger, PAYLOAD
+from typing import Iterator, List, Optional, Tuple
+
+# Fixed replies, also pre-rendered by the TTS cache
+MSG_INVALID_QUESTION = "Please provide a valid question."
+MSG_NO_ANSWER = "I couldn't generate a response."
+MSG_LLM_ERROR = "I encountered an error while processing your question. Please try again."
 
 class LLMService:
-    def __init__(self):
-        self.llm = ChatGroq(
+    def __init__(self, llm=None, vector_store_service=None):
+        # Pooled HTTP clients shared by every call to the provider
+        self.http_client, self.http_async_client = create_http_clients()
+        self.llm = llm or ChatGroq(
             api_key=Config.groq_api_key,
             model_name="llama3-70b-8192",
             temperature=0.7,
+            base_url=Config.groq_base_url or None,
+            timeout=Config.llm_timeout_seconds,
+            max_retries=Config.llm_max_retries,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client
         )
         
-        self.vector_store_service = VectorStoreService()
-        
-        # Memory for conversation - keeps last 10 exchanges (20 messages)
-        self.memory = ConversationBufferWindowMemory(
-            k=10,  # Keep last 10 user-AI exchanges
-            return_messages=False,
-            memory_key="chat_history"
+        # Deadlines, provider concurrency limit and hedging for async calls
+        self.llm_caller = ResilientLLMCaller(
+            max_concurrency=Config.llm_max_concurrency,
+            hedge=Config.llm_hedge_enabled,
+            hedge_quantile=Config.llm_hedge_quantile,
+            hedge_min_delay=Config.llm_hedge_min_delay_ms / 1000,
+            hedge_min_samples=Config.llm_hedge_min_samples
         )
         
+        self.vector_store_service = vector_store_service or VectorStoreService()
+        
+        # Conversation memory per session - keeps last N exchanges each
+        self.memory = create_session_store()
+        
+        # Token-budgeted prompts; older turns are folded into a summary off the request path
+        self.budgeted = Config.memory_mode.lower() == "budget"
+        self.summarizer = None
+        if self.budgeted:
+            self.summarizer = MemorySummarizer(
+                ChatGroq(
+                    api_key=Config.groq_api_key,
+                    model_name=Config.summary_model,
+                    temperature=0.0,
+                    max_tokens=Config.summary_max_tokens,
+                    base_url=Config.groq_base_url or None,
+                    timeout=Config.llm_timeout_seconds,
+                    max_retries=Config.llm_max_retries,
+                    http_client=self.http_client
+                ) if llm is None else llm,
+                self.memory,
+                trigger_tokens=Config.summary_trigger_tokens,
+                keep_turns=Config.summary_keep_turns,
+                max_words=Config.summary_max_words
+            )
+        self.token_accounting = TokenAccounting()
+        
+        # Answers to first-turn questions, matched by query embedding similarity
+        self.semantic_cache = None
+        if Config.semantic_cache_enabled:
+            self.semantic_cache = SemanticCache(
+                capacity=Config.semantic_cache_size,
+                threshold=Config.semantic_cache_threshold
+            )
+        
         # Enhanced prompt with memory integration
         self.conversation_prompt = ChatPromptTemplate.from_messages([
             ("system", """You are Harshil Pansuriya, a passionate AI/ML engineer who bridges complex technology with human-centered solutions.Use the provided context as the definitive source for all personal details, including projects, experiences, and growth areas.
@@ -62,52 +118,212 @@ class LLMService:
                 ("human", "{input}")
         ])
         
-        # Setup retrieval chain for context
+        # Retrieval runs separately so the context can be measured and trimmed
         self.retriever = self.vector_store_service.get_retriever()
+        self.retrieval_policy = None
+        if Config.retrieval_policy_enabled:
+            self.retrieval_policy = RetrievalPolicy(
+                self.retriever,
+                self.vector_store_service.embeddings,
+                reuse_threshold=Config.retrieval_reuse_threshold,
+                extend_threshold=Config.retrieval_extend_threshold,
+                merge_min_overlap=Config.chunk_merge_min_overlap,
+                max_sessions=Config.session_max_sessions
+            )
         self.document_chain = create_stuff_documents_chain(self.llm, self.conversation_prompt)
-        self.retrieval_chain = create_retrieval_chain(self.retriever, self.document_chain)
+        self.system_tokens = count_tokens(
+            self.conversation_prompt.format_messages(chat_history="", context="", input="")[0].content
+        )
         
         logger.info("LLM Service with conversation memory initialized")
 
-    def process_query(self, query: str) -> str:
+    def _lookup_cache(self, query: str, chat_history: str) -> Tuple[Optional[str], Optional[List[float]]]:
+        """Return (cached answer, query embedding); only used when there is no history yet"""
+        if self.semantic_cache is None or chat_history:
+            return None, None
+        vector = self.vector_store_service.embeddings.embed_query(query)
+        return self.semantic_cache.lookup(vector, self.vector_store_service.corpus_version), vector
+
+    def _store_cache(self, vector: Optional[List[float]], answer: str):
+        if vector is not None and answer != MSG_NO_ANSWER:
+            self.semantic_cache.store(vector, answer, self.vector_store_service.corpus_version)
+
+    def _retrieve(self, query: str, session_id: str):
+        """Context documents for this turn and the retrieval path taken"""
+        if self.retrieval_policy is not None:
+            return self.retrieval_policy.retrieve(session_id, query)
+        # Includes the query embedding, which is also timed on its own
+        with timed("retrieval"):
+            return self.retriever.invoke(query), "retrieve"
+
+    def _build_inputs(self, query: str, session_id: str, summary: str, turns) -> dict:
+        """Retrieve context and fit it with the history into the prompt budget"""
+        docs, path = self._retrieve(query, session_id)
+        chat_history, docs, usage = fit_prompt(
+            self.system_tokens,
+            query,
+            summary,
+            turns,
+            docs,
+            budget=Config.prompt_token_budget if self.budgeted else None,
+            context_budget=Config.context_token_budget if self.budgeted else None
+        )
+        self.token_accounting.record(usage)
+        request = current_request()
+        if request is not None:
+            request.prompt_tokens = usage
+            request.retrieval_path = path
+        logger.info("Prompt tokens: %s", usage)
+        return {"input": query, "chat_history": chat_history, "context": docs}
+
+    def _save_turn(self, session_id: str, query: str, answer: str):
+        self.memory.save_turn(session_id, query, answer)
+        if self.summarizer is not None:
+            self.summarizer.maybe_schedule(session_id)
+
+    def _prepare(self, query: str, session_id: str) -> Tuple[Optional[str], Optional[dict], Optional[List[float]], str]:
+        """Load memory and check the semantic cache, then build the chain inputs.
+
+        Returns (cached answer, chain inputs, query embedding, chat history);
+        on a cache hit the turn is saved and no inputs are built.
+        """
+        with timed("memory"):
+            summary, turns = self.memory.get_memory(session_id)
+        chat_history = format_history(turns, summary)
+        
+        with timed("semantic_cache"):
+            cached_answer, query_vector = self._lookup_cache(query, chat_history)
+        if cached_answer is not None:
+            self._save_turn(session_id, query, cached_answer)
+            logger.info("Semantic cache hit for query: %s", query, extra=PAYLOAD)
+            return cached_answer, None, query_vector, chat_history
+        
+        # Get relevant context from vector store
+        return None, self._build_inputs(query, session_id, summary, turns), query_vector, chat_history
+
+    def _finish(self, query: str, session_id: str, answer: str, query_vector: Optional[List[float]], chat_history: str, label: str = "Query"):
+        """Save the turn, cache the answer and log the exchange"""
+        with timed("memory_save"):
+            self._save_turn(session_id, query, answer)
+        self._store_cache(query_vector, answer)
+        
+        logger.info("%s: %s (has history: %s)", label, query, bool(chat_history), extra=PAYLOAD)
+        logger.info("Response: %s", answer, extra=PAYLOAD)
+
+    def process_query(self, query: str, session_id: str) -> str:
         try:
             if not query.strip():
-                return "Please provide a valid question."
+                return MSG_INVALID_QUESTION
+            
+            cached_answer, inputs, query_vector, chat_history = self._prepare(query.strip(), session_id)
+            if cached_answer is not None:
+                return cached_answer
             
-            # Get conversation history
-            chat_history = self.memory.buffer
+            with timed("llm"):
+                answer = self.document_chain.invoke(inputs) or MSG_NO_ANSWER
             
-            # Get relevant context from vector store
-            retrieval_result = self.retrieval_chain.invoke({
-                "input": query.strip(),
-                "chat_history": chat_history
-            })
+            self._finish(query.strip(), session_id, answer, query_vector, chat_history)
+            return answer
+            
+        except Exception as e:
+            logger.error("Error processing query: %s", e)
+            return MSG_LLM_ERROR
+    
+    async def aprocess_query(self, query: str, session_id: str, run_blocking) -> str:
+        """Async variant of process_query for the event loop.
+
+        Memory, cache and retrieval run through `run_blocking` (the request's
+        worker pool reservation), so they count against the pool's bounded
+        capacity; the LLM call is awaited through the shared async client,
+        bounded by the provider concurrency limit and by a deadline derived
+        from the request budget.
+        """
+        try:
+            if not query.strip():
+                return MSG_INVALID_QUESTION
             
-            answer = retrieval_result.get("answer", "I couldn't generate a response.")
+            request = current_request()
+            started = request.started if request is not None else time.monotonic()
+            deadline = started + Config.request_budget_seconds - Config.llm_deadline_reserve_seconds
             
-            # Save to memory
-            self.memory.save_context(
-                {"input": query.strip()}, 
-                {"output": answer}
+            cached_answer, inputs, query_vector, chat_history = await run_blocking(
+                self._prepare, query.strip(), session_id
             )
+            if cached_answer is not None:
+                return cached_answer
             
-            # Log query and response
-            logger.info(f"Query: {query}")
-            logger.info(f"Has History: {bool(chat_history)}")
-            logger.info(f"Response: {answer}")
-            logger.info("-" * 50)
+            with timed("llm"):
+                answer = await self.llm_caller.call(lambda: self.document_chain.ainvoke(inputs), deadline) or MSG_NO_ANSWER
             
+            await run_blocking(self._finish, query.strip(), session_id, answer, query_vector, chat_history)
             return answer
             
+        except asyncio.TimeoutError:
+            logger.error("Error processing query: LLM deadline exceeded")
+            return MSG_LLM_ERROR
+        except Exception as e:
+            logger.error("Error processing query: %s", e)
+            return MSG_LLM_ERROR
+    
+    def stream_query(self, query: str, session_id: str) -> Iterator[str]:
+        """Yield answer tokens as the LLM produces them, saving the turn at the end"""
+        if not query.strip():
+            yield MSG_INVALID_QUESTION
+            return
+        
+        answer_parts = []
+        try:
+            cached_answer, inputs, query_vector, chat_history = self._prepare(query.strip(), session_id)
+            if cached_answer is not None:
+                yield cached_answer
+                return
+            
+            started = time.perf_counter()
+            with timed("llm"):
+                for token in self.document_chain.stream(inputs):
+                    if token:
+                        if not answer_parts:
+                            observe_stage("llm_first_token", time.perf_counter() - started)
+                        answer_parts.append(token)
+                        yield token
+            
+            answer = "".join(answer_parts) or MSG_NO_ANSWER
+            if not answer_parts:
+                yield answer
+            
+            self._finish(query.strip(), session_id, answer, query_vector, chat_history, label="Query (streamed)")
+            
         except Exception as e:
-            logger.error(f"Error processing query: {str(e)}")
-            return "I encountered an error while processing your question. Please try again."
+            logger.error("Error streaming query: %s", e)
+            if not answer_parts:
+                yield MSG_LLM_ERROR
+    
+    def stats(self) -> dict:
+        """Runtime statistics for conversation memory and caches"""
+        return {
+            "sessions": self.memory.stats(),
+            "prompt_tokens": self.token_accounting.stats(),
+            "summarizer": self.summarizer.stats() if self.summarizer else None,
+            "semantic_cache": self.semantic_cache.stats() if self.semantic_cache else None,
+            "llm_calls": self.llm_caller.stats(),
+            "retrieval": self.retrieval_policy.stats() if self.retrieval_policy else None
+        }
+    
+    def close(self):
+        if self.summarizer is not None:
+            self.summarizer.close()
+        self.http_client.close()
+    
+    async def aclose(self):
+        await self.http_async_client.aclose()
     
-    def clear_memory(self):
-        """Clear conversation history"""
-        self.memory.clear()
+    def clear_memory(self, session_id: str):
+        """Clear conversation history for a session"""
+        self.memory.clear(session_id)
+        if self.retrieval_policy is not None:
+            self.retrieval_policy.forget(session_id)
         logger.info("Conversation memory cleared")
     
-    def get_conversation_history(self) -> str:
-        """Get current conversation history"""
-        return self.memory.buffer
\ No newline at end of file
+    def get_conversation_history(self, session_id: str) -> str:
+        """Get current conversation history for a session"""
+        return self.memory.get_history(session_id)
\ No newline at end of file
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import numpy as np
+from typing import Any, List, Tuple
+from pydantic import ConfigDict
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from config.logging import logger
+
+VECTORS_FILE = "embeddings.npy"
+CHUNKS_FILE = "chunks.json"
+
+class LocalVectorIndex:
+    """Exact in-process vector index backed by a memory-mapped .npy file.
+
+    Embeddings are stored L2-normalized, so top-k by cosine similarity is a
+    single matrix-vector product. The matrix is opened with mmap_mode="r",
+    so every process reading the same file (including forked workers) shares
+    one copy of the pages through the OS page cache. Searches reopen the
+    files after an ingestion in another process replaces them, so serving
+    processes pick up a new index without a restart.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._loaded_mtime = None
+        self.load()
+
+    def load(self):
+        vectors_path = os.path.join(self.directory, VECTORS_FILE)
+        chunks_path = os.path.join(self.directory, CHUNKS_FILE)
+        if not (os.path.exists(vectors_path) and os.path.exists(chunks_path)):
+            logger.warning(f"Local vector index not found in {self.directory}")
+            return
+
+        # The chunks file is replaced last, so its mtime marks a complete index
+        mtime = os.stat(chunks_path).st_mtime_ns
+        vectors = np.load(vectors_path, mmap_mode="r")
+        with open(chunks_path, "r") as f:
+            chunks = json.load(f)
+        if len(vectors) != len(chunks["ids"]):
+            logger.warning("Local vector index files are out of step, keeping the loaded index")
+            return
+        with self._lock:
+            self._vectors = vectors
+            self._ids = chunks["ids"]
+            self._texts = chunks["texts"]
+            self._loaded_mtime = mtime
+        logger.info(f"Loaded local vector index with {len(self._ids)} chunks")
+
+    def reload_if_changed(self):
+        """Reopen the index if another process has written a new one since it was loaded"""
+        try:
+            mtime = os.stat(os.path.join(self.directory, CHUNKS_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._loaded_mtime:
+            self.load()
+
+    def save(self, ids: List[str], texts: List[str], vectors: np.ndarray):
+        """Persist a full index atomically and reopen it memory-mapped"""
+        os.makedirs(self.directory, exist_ok=True)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        # Write next to the target and rename, so readers never see a partial
+        # file and processes still mapping the old file keep a valid view
+        vectors_path = os.path.join(self.directory, VECTORS_FILE)
+        chunks_path = os.path.join(self.directory, CHUNKS_FILE)
+        with open(f"{vectors_path}.tmp", "wb") as f:
+            np.save(f, vectors)
+        with open(f"{chunks_path}.tmp", "w") as f:
+            json.dump({"ids": ids, "texts": texts}, f)
+        os.replace(f"{vectors_path}.tmp", vectors_path)
+        os.replace(f"{chunks_path}.tmp", chunks_path)
+        self.load()
+
+    def update(self, ids: List[str], texts: List[str], vectors: np.ndarray, delete_ids: List[str]):
+        """Add or replace chunks and drop deleted ones, then persist the result"""
+        with self._lock:
+            current_vectors, current_ids, current_texts = self._vectors, self._ids, self._texts
+        drop = set(delete_ids) | set(ids)
+        keep = [i for i, chunk_id in enumerate(current_ids) if chunk_id not in drop]
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if keep:
+            kept = np.asarray(current_vectors[keep], dtype=np.float32)
+            vectors = np.concatenate([kept, vectors]) if len(ids) else kept
+        elif not len(ids):
+            vectors = np.zeros((0, 0), dtype=np.float32)
+        self.save(
+            [current_ids[i] for i in keep] + list(ids),
+            [current_texts[i] for i in keep] + list(texts),
+            vectors
+        )
+
+    def search(self, query_vector, k: int) -> List[Tuple[str, str, float]]:
+        """Return (id, text, score) for the k most similar chunks"""
+        self.reload_if_changed()
+        with self._lock:
+            vectors, ids, texts = self._vectors, self._ids, self._texts
+        if not len(ids):
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = vectors @ (query / norm if norm else query)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], texts[i], float(scores[i])) for i in top]
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+class LocalIndexRetriever(BaseRetriever):
+    """LangChain retriever over a LocalVectorIndex"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: Any
+    embeddings: Any
+    k: int = 3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        vector = self.embeddings.embed_query(query)
+        return [
+            Document(page_content=text, metadata={"id": chunk_id, "score": score})
+            for chunk_id, text, score in self.index.search(vector, self.k)
+        ]
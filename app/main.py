@@ -1,69 +1,580 @@
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import JSONResponse
-from speech_service import SpeechService
-from config.logging import logger
+from fastapi import FastAPI, UploadFile, File, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.requests import HTTPConnection
+from startup import PipelineLoader
+from streaming_stt import StreamingTranscriber
+from audio_codec import AUDIO_FORMATS, media_type
+from audio_ingest import AudioTooLargeError
+from worker_pool import WorkerPool, PipelineBusyError
+from idempotency import IdempotencyCache
+from request_context import begin_request, current_request_id
+from metrics import IN_FLIGHT, REQUEST_SECONDS, RESPONSE_BYTES, render_metrics
+from config.setting import Config
+from config.logging import logger, set_request_id_getter
+from contextlib import asynccontextmanager
+from typing import BinaryIO, List, Optional, Tuple
+import asyncio
 import base64
+import json
+import tempfile
+import time
+import uuid
 import uvicorn
+from urllib.parse import quote
 
-app = FastAPI(title="VoiceMate AI with Memory")
+set_request_id_getter(current_request_id)
 
-speech_service = SpeechService()
+# Models load in the background after startup; see lifespan below
+pipeline_loader = PipelineLoader()
+speech_service = None
+
+async def start_pipeline():
+    global speech_service
+    try:
+        speech_service = await asyncio.to_thread(
+            pipeline_loader.load,
+            Config.pipeline_load_attempts,
+            Config.pipeline_load_backoff_seconds
+        )
+    except Exception as e:
+        logger.error("Pipeline failed to load: %s", e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loading = asyncio.create_task(start_pipeline())
+    yield
+    pipeline_loader.stop()
+    loading.cancel()
+    worker_pool.shutdown()
+    if speech_service is not None:
+        speech_service.close()
+        await speech_service.llm_service.aclose()
+
+app = FastAPI(title="VoiceMate AI with Memory", lifespan=lifespan)
+
+worker_pool = WorkerPool(
+    max_workers=Config.pipeline_workers,
+    queue_size=Config.pipeline_queue_size
+)
+
+idempotency_cache = IdempotencyCache(
+    ttl_seconds=Config.idempotency_ttl_seconds,
+    max_entries=Config.idempotency_max_entries,
+    max_bytes=Config.idempotency_max_bytes
+)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+PROMPT_TOKENS_HEADER = "X-Prompt-Tokens"
+RETRIEVAL_PATH_HEADER = "X-Retrieval-Path"
+
+def route_label(request: Request) -> str:
+    """Metric label for the request path, bounded to the app's own routes"""
+    path = request.url.path
+    return path if any(getattr(route, "path", None) == path for route in app.routes) else "other"
+
+@app.middleware("http")
+async def request_context_middleware(request: Request, call_next):
+    """Open a request context that pipeline stages report into, and record request metrics"""
+    request_id = request.headers.get(REQUEST_ID_HEADER)
+    context = begin_request(request_id if request_id and len(request_id) <= 64 else None)
+    route = route_label(request)
+    started = time.perf_counter()
+    status = "500"
+    IN_FLIGHT.labels(route).inc()
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+    finally:
+        IN_FLIGHT.labels(route).dec()
+        REQUEST_SECONDS.labels(route, status).observe(time.perf_counter() - started)
+
+    response.headers[REQUEST_ID_HEADER] = context.request_id
+    if context.prompt_tokens is not None:
+        response.headers[PROMPT_TOKENS_HEADER] = str(context.prompt_tokens["total"])
+    if context.retrieval_path is not None:
+        response.headers[RETRIEVAL_PATH_HEADER] = context.retrieval_path
+    # Streaming responses return before the pipeline has run, so they carry no breakdown
+    if context.stages:
+        context.add_stage("total", time.perf_counter() - started)
+        response.headers["Server-Timing"] = context.server_timing()
+    content_length = response.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        RESPONSE_BYTES.labels(route).observe(int(content_length))
+    return response
+
+def busy_response() -> JSONResponse:
+    return JSONResponse(
+        content={"error": "Server is busy. Please retry shortly."},
+        status_code=503,
+        headers={"Retry-After": str(Config.pipeline_retry_after)}
+    )
+
+def not_ready_response() -> JSONResponse:
+    return JSONResponse(
+        content={"error": "Service is starting. Please retry shortly.", **pipeline_loader.status()},
+        status_code=503,
+        headers={"Retry-After": str(Config.pipeline_retry_after)}
+    )
+
+SESSION_HEADER = "X-Session-ID"
+SESSION_COOKIE = "session_id"
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# Raw uploads stay in memory up to this size, like UploadFile's spooling
+SPOOL_MEMORY_BYTES = 1024 * 1024
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+def valid_session_id(session_id: Optional[str]) -> Optional[str]:
+    """Return `session_id` if it is usable as a session store key"""
+    if session_id and len(session_id) <= 128:
+        return session_id
+    return None
+
+def get_session_id(request: HTTPConnection) -> Optional[str]:
+    """Read the caller's session id from the header or cookie"""
+    return valid_session_id(request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE))
+
+def resolve_session_id(request: HTTPConnection) -> Tuple[str, bool]:
+    """Return the caller's session id, creating one if absent"""
+    session_id = get_session_id(request)
+    if session_id:
+        return session_id, False
+    return uuid.uuid4().hex, True
+
+def attach_session(response: Response, session_id: str, is_new: bool) -> Response:
+    response.headers[SESSION_HEADER] = session_id
+    if is_new:
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    return response
+
+class ClosingStreamingResponse(StreamingResponse):
+    """StreamingResponse that always awaits `on_close`, even if the client left before the body was sent"""
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.on_close()
+
+def serialize_event(event: dict) -> dict:
+    """Make a pipeline stream event JSON-safe by base64-encoding its audio"""
+    if "audio" in event:
+        audio = event["audio"]
+        event = {**event, "audio": base64.b64encode(audio).decode('utf-8') if audio else ""}
+    return event
+
+ACCEPT_FORMATS = {
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/flac": "flac",
+    "audio/ogg": "ogg",
+    "audio/opus": "opus",
+}
+
+def parse_accept(header: str) -> List[Tuple[str, dict]]:
+    """Accept header entries as (media type, parameters), highest q first.
+
+    Entries with q=0 are dropped; equal q values keep the header's order.
+    """
+    entries = []
+    for position, item in enumerate(header.split(",")):
+        media, *raw_params = item.split(";")
+        media = media.strip().lower()
+        if not media:
+            continue
+        params = {}
+        for raw in raw_params:
+            name, _, value = raw.partition("=")
+            params[name.strip().lower()] = value.strip().strip('"').lower()
+        try:
+            q = float(params.pop("q", "1"))
+        except ValueError:
+            q = 1.0
+        if q > 0:
+            entries.append((-q, position, media, params))
+    return [(media, params) for _, _, media, params in sorted(entries)]
+
+def negotiate_response(request: Request) -> Tuple[str, str]:
+    """Pick the response mode (json, binary or multipart) and audio codec.
+
+    Accept entries are tried in q order; `audio/*` selects binary WAV and
+    `*/*` or `application/*` select JSON. JSON with base64 WAV stays the
+    default for legacy clients. A `format` query parameter overrides the
+    codec chosen from the Accept header.
+    """
+    mode, audio_format = "json", "wav"
+    for media, params in parse_accept(request.headers.get("accept", "")):
+        if media in ("multipart/mixed", "multipart/*"):
+            mode = "multipart"
+            break
+        if media in ACCEPT_FORMATS or media == "audio/*":
+            mode = "binary"
+            audio_format = "opus" if params.get("codecs") == "opus" else ACCEPT_FORMATS.get(media, "wav")
+            break
+        if media in ("application/json", "application/*", "*/*"):
+            break
+
+    requested = request.query_params.get("format", "").lower()
+    if requested in AUDIO_FORMATS:
+        audio_format = requested
+    return mode, audio_format
+
+def build_voice_response(response_text: str, audio_response: bytes, mode: str, audio_format: str) -> Response:
+    """Shape a pipeline result according to the negotiated response mode"""
+    if mode == "binary":
+        return Response(
+            content=audio_response,
+            media_type=media_type(audio_format),
+            headers={"X-Response-Text": quote(response_text), "X-Has-Memory": "true"}
+        )
+
+    if mode == "multipart":
+        boundary = uuid.uuid4().hex
+        metadata = json.dumps({"response_text": response_text, "has_memory": True}).encode("utf-8")
+        body = b"".join([
+            f"--{boundary}\r\nContent-Type: application/json\r\n\r\n".encode("ascii"),
+            metadata,
+            f"\r\n--{boundary}\r\nContent-Type: {media_type(audio_format)}\r\n\r\n".encode("ascii"),
+            audio_response,
+            f"\r\n--{boundary}--\r\n".encode("ascii"),
+        ])
+        return Response(content=body, media_type=f"multipart/mixed; boundary={boundary}")
+
+    # Encode audio response as base64
+    audio_base64 = base64.b64encode(audio_response).decode('utf-8') if audio_response else ""
+    return JSONResponse(
+        content={
+            "response_text": response_text,
+            "audio_response": audio_base64,
+            "has_memory": True
+        },
+        status_code=200
+    )
+
+def too_large_response(detail: str) -> JSONResponse:
+    return JSONResponse(
+        content={"error": "Audio upload is too large.", "detail": detail},
+        status_code=413
+    )
+
+def upload_too_large(request: Request) -> bool:
+    """Cheap pre-check on the declared request size before any decoding"""
+    content_length = request.headers.get("content-length")
+    return bool(content_length and content_length.isdigit() and int(content_length) > Config.max_upload_bytes)
 
 @app.get("/")
 async def root():
     return {"message": "VoiceMate AI with conversation memory is running"}
 
-@app.post("/process_voice")
-async def process_voice(file: UploadFile = File(...)):
-    """Process voice with conversation memory"""
+@app.get("/health")
+async def health():
+    """Liveness probe: the process is up and the pipeline has not given up loading"""
+    if pipeline_loader.failed:
+        return JSONResponse(content={"status": "failed", "error": pipeline_loader.error}, status_code=503)
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: reports which pipeline components are loaded"""
+    return JSONResponse(
+        content=pipeline_loader.status(),
+        status_code=200 if pipeline_loader.ready else 503
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage latencies and errors, in-flight requests, audio and response sizes"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/stats")
+async def stats():
+    """Runtime statistics for the worker pool and pipeline stages"""
+    if speech_service is None:
+        return not_ready_response()
+    return JSONResponse(
+        content={
+            "worker_pool": worker_pool.stats(),
+            "idempotency": idempotency_cache.stats(),
+            **speech_service.stats()
+        },
+        status_code=200
+    )
+
+async def spool_request_body(request: Request) -> BinaryIO:
+    """Copy a raw, possibly chunked, request body into a spooled temp file as it arrives.
+
+    Chunked uploads carry no Content-Length, so the size limit is enforced
+    while receiving.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    received = 0
     try:
-        audio_data = await file.read()
-        logger.info(f"Received audio file: {file.filename}")
-        
-        # Process voice query with memory
-        response_text, audio_response = speech_service.process_voice_query(audio_data)
-        
-        # Encode audio response as base64
-        audio_base64 = base64.b64encode(audio_response).decode('utf-8') if audio_response else ""
-        
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > Config.max_upload_bytes:
+                raise AudioTooLargeError(f"Upload exceeds the {Config.max_upload_bytes} byte limit")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+async def answer_voice(request: Request, source: BinaryIO, route: str) -> Response:
+    """Run the voice pipeline on an uploaded clip and shape the reply"""
+    session_id, is_new = resolve_session_id(request)
+    mode, audio_format = negotiate_response(request)
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 128:
         return JSONResponse(
-            content={
-                "response_text": response_text,
-                "audio_response": audio_base64,
-                "has_memory": True
-            },
-            status_code=200
+            content={"error": f"{IDEMPOTENCY_HEADER} must be 1 to 128 characters."},
+            status_code=400
         )
+    
+    async def run_pipeline():
+        # Decode straight from the spooled upload on a pipeline worker
+        if Config.llm_async:
+            with worker_pool.reserve() as slot:
+                result = await speech_service.aprocess_voice_query(
+                    source, session_id, audio_format, slot.run
+                )
+        else:
+            result = await worker_pool.run(
+                speech_service.process_voice_query, source, session_id, audio_format
+            )
+        return (*result, audio_format, session_id)
+    
+    try:
+        replayed = False
+        if idempotency_key and Config.idempotency_ttl_seconds > 0:
+            # Matched by key alone, so a retry that lost its session id still gets the stored reply
+            # Canned failure replies are not stored, so a retry gets a fresh attempt
+            (response_text, audio_response, audio_format, first_session_id), replayed = await idempotency_cache.run(
+                idempotency_key,
+                run_pipeline,
+                size=lambda result: len(result[0]) + len(result[1]),
+                keep=lambda result: not speech_service.is_canned_reply(result[0])
+            )
+            if replayed and not is_new and first_session_id != session_id:
+                return JSONResponse(
+                    content={"error": f"{IDEMPOTENCY_HEADER} was already used by another session."},
+                    status_code=422
+                )
+            if replayed:
+                logger.info("Replaying %s response for %s %s", route, IDEMPOTENCY_HEADER, idempotency_key)
+                if is_new:
+                    # The key alone does not prove the caller owns the first request's session
+                    response = build_voice_response(response_text, audio_response, mode, audio_format)
+                    response.headers[REPLAYED_HEADER] = "true"
+                    return response
+        else:
+            response_text, audio_response, audio_format, session_id = await run_pipeline()
+        
+        response = build_voice_response(response_text, audio_response, mode, audio_format)
+        if replayed:
+            response.headers[REPLAYED_HEADER] = "true"
+        return attach_session(response, session_id, is_new)
         
+    except PipelineBusyError:
+        logger.warning("Rejected %s: pipeline queue full", route)
+        return busy_response()
+    except AudioTooLargeError as e:
+        logger.warning("Rejected %s: %s", route, e)
+        return too_large_response(str(e))
     except Exception as e:
-        logger.error(f"Error in /process_voice: {str(e)}")
+        logger.error("Error in %s: %s", route, e)
         return JSONResponse(
             content={"error": "Failed to process audio."},
             status_code=500
         )
 
+@app.post("/process_voice")
+async def process_voice(request: Request, file: UploadFile = File(...)):
+    """Process voice with conversation memory.
+
+    Responds with JSON and base64 WAV by default. Send `Accept: audio/*` for a
+    raw audio body (reply text in the X-Response-Text header) or
+    `Accept: multipart/mixed` for a JSON part followed by an audio part.
+    
+    Retries sent with the same `Idempotency-Key` header in the same session
+    get the first request's reply (marked `Idempotent-Replayed: true`)
+    without running the pipeline or adding a memory turn again. A retry
+    without a session id still gets the reply, but not the session id the
+    first request was given; a key already used by another session is
+    rejected.
+    """
+    if speech_service is None:
+        return not_ready_response()
+    if upload_too_large(request):
+        return too_large_response(f"Limit is {Config.max_upload_bytes} bytes")
+    logger.info("Received audio file: %s", file.filename)
+    return await answer_voice(request, file.file, "/process_voice")
+
+@app.post("/process_voice_raw")
+async def process_voice_raw(request: Request):
+    """Same as /process_voice, with the audio file as the raw request body.
+
+    Accepts chunked transfer encoding, so a client can upload while it is
+    still recording and encoding (e.g. Ogg Opus, which is written
+    append-only). Response negotiation and Idempotency-Key work as on
+    /process_voice.
+    """
+    if speech_service is None:
+        return not_ready_response()
+    if upload_too_large(request):
+        return too_large_response(f"Limit is {Config.max_upload_bytes} bytes")
+    try:
+        source = await spool_request_body(request)
+    except AudioTooLargeError as e:
+        logger.warning("Rejected /process_voice_raw: %s", e)
+        return too_large_response(str(e))
+    try:
+        logger.info("Received raw audio upload: %s", request.headers.get('content-type', 'unknown type'))
+        return await answer_voice(request, source, "/process_voice_raw")
+    finally:
+        source.close()
+
+@app.post("/process_voice_stream")
+async def process_voice_stream(request: Request, file: UploadFile = File(...)):
+    """Process voice and stream the reply as Server-Sent Events.
+
+    Emits a `transcript` event, then one `sentence` event per synthesized
+    sentence (text plus base64 WAV) as soon as it is ready, then `done`.
+    """
+    if speech_service is None:
+        return not_ready_response()
+    session_id, is_new = resolve_session_id(request)
+    if upload_too_large(request):
+        return too_large_response(f"Limit is {Config.max_upload_bytes} bytes")
+    try:
+        audio_data = await file.read()
+        logger.info("Received audio file for streaming: %s", file.filename)
+        events = worker_pool.iterate(speech_service.stream_voice_query, audio_data, session_id)
+    except PipelineBusyError:
+        logger.warning("Rejected /process_voice_stream: pipeline queue full")
+        return busy_response()
+
+    async def event_source():
+        try:
+            async for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(serialize_event(event))}\n\n"
+        except Exception as e:
+            logger.error("Error in /process_voice_stream: %s", e)
+            yield f"event: error\ndata: {json.dumps({'error': 'Failed to process audio.'})}\n\n"
+
+    # Closing the pipeline stream frees its worker slot even if it never started
+    response = ClosingStreamingResponse(
+        event_source(),
+        on_close=events.aclose,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    return attach_session(response, session_id, is_new)
+
+@app.websocket("/ws/voice")
+async def voice_stream(websocket: WebSocket):
+    """Stream 16 kHz mono int16 PCM as binary frames and get incremental transcripts.
+
+    The server sends {"type": "partial"} transcripts while audio arrives and a
+    {"type": "final"} transcript once it detects end-of-speech or the client
+    sends {"type": "end"}. The reply is then streamed as {"type": "sentence"}
+    messages (text plus base64 WAV) followed by {"type": "done"}.
+    """
+    await websocket.accept()
+    if speech_service is None:
+        await websocket.send_json({"type": "error", "error": "Service is starting. Please retry shortly."})
+        await websocket.close(code=1013)
+        return
+    session_id = (
+        valid_session_id(websocket.query_params.get("session_id"))
+        or get_session_id(websocket)
+        or uuid.uuid4().hex
+    )
+    transcriber = StreamingTranscriber(
+        speech_service.transcribe_pcm,
+        window_seconds=Config.stream_window_seconds,
+        step_seconds=Config.stream_step_seconds,
+        pause_ms=Config.stream_pause_ms,
+        endpoint_ms=Config.stream_endpoint_ms,
+        silence_rms=Config.stream_silence_rms
+    )
+    partial_task: Optional[asyncio.Task] = None
+
+    async def send_partial():
+        text = await worker_pool.run(transcriber.update_partial)
+        await websocket.send_json({"type": "partial", "text": text})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                transcriber.add_chunk(message["bytes"])
+                if transcriber.end_of_speech:
+                    break
+                # Decode in the background so receiving never waits on Whisper
+                if (partial_task is None or partial_task.done()) and transcriber.partial_due():
+                    partial_task = asyncio.create_task(send_partial())
+            elif message.get("text") and json.loads(message["text"]).get("type") == "end":
+                break
+
+        if partial_task is not None:
+            await asyncio.gather(partial_task, return_exceptions=True)
+        transcript = await worker_pool.run(transcriber.finalize)
+        await websocket.send_json({"type": "final", "text": transcript, "session_id": session_id})
+
+        events = worker_pool.iterate(speech_service.stream_response, transcript, session_id)
+        try:
+            async for event in events:
+                await websocket.send_json(serialize_event(event))
+        finally:
+            await events.aclose()
+        await websocket.close()
+
+    except PipelineBusyError:
+        logger.warning("Rejected /ws/voice: pipeline queue full")
+        await websocket.send_json({"type": "error", "error": "Server is busy. Please retry shortly."})
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        logger.info("Client disconnected from /ws/voice")
+    except Exception as e:
+        logger.error("Error in /ws/voice: %s", e)
+        await websocket.close(code=1011)
+
 @app.post("/clear_memory")
-async def clear_memory():
-    """Clear conversation memory"""
+async def clear_memory(request: Request):
+    """Clear conversation memory for the caller's session"""
+    if speech_service is None:
+        return not_ready_response()
     try:
-        speech_service.clear_conversation_memory()
+        session_id = get_session_id(request)
+        if session_id:
+            speech_service.clear_conversation_memory(session_id)
         logger.info("Memory cleared via API")
         return JSONResponse(
             content={"message": "Conversation memory cleared successfully"},
             status_code=200
         )
     except Exception as e:
-        logger.error(f"Error clearing memory: {str(e)}")
+        logger.error("Error clearing memory: %s", e)
         return JSONResponse(
             content={"error": "Failed to clear memory"},
             status_code=500
         )
 
 @app.get("/memory_status")
-async def memory_status():
-    """Get current memory status"""
+async def memory_status(request: Request):
+    """Get current memory status for the caller's session"""
+    if speech_service is None:
+        return not_ready_response()
     try:
-        history = speech_service.llm_service.get_conversation_history()
+        session_id = get_session_id(request)
+        history = speech_service.llm_service.get_conversation_history(session_id) if session_id else ""
         return JSONResponse(
             content={
                 "has_conversation": bool(history),
@@ -72,7 +583,7 @@ async def memory_status():
             status_code=200
         )
     except Exception as e:
-        logger.error(f"Error getting memory status: {str(e)}")
+        logger.error("Error getting memory status: %s", e)
         return JSONResponse(
             content={"error": "Failed to get memory status"},
             status_code=500
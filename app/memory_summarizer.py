@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from session_store import format_history
+from token_budget import count_tokens
+from config.logging import logger
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You maintain a running summary of a conversation between a visitor and Harshil's voice assistant.
+        Merge the new turns into the current summary. Keep the topics, projects, names and facts the visitor
+        asked about or shared, and any open follow-up. Write plain prose in at most {max_words} words."""),
+    ("human", "Current summary:\n{summary}\n\nNew turns:\n{turns}\n\nUpdated summary:")
+])
+
+class MemorySummarizer:
+    """Folds older conversation turns into a running summary in the background.
+
+    After each saved turn the session is checked; once its verbatim history
+    exceeds `trigger_tokens`, every turn but the newest `keep_turns` is
+    summarized together with the existing summary on a single background
+    thread, so the LLM call never sits on the request path. At most one
+    summarization per session is in flight.
+    """
+
+    def __init__(self, llm, store, trigger_tokens: int, keep_turns: int, max_words: int):
+        self.chain = SUMMARY_PROMPT | llm | StrOutputParser()
+        self.store = store
+        self.trigger_tokens = trigger_tokens
+        self.keep_turns = keep_turns
+        self.max_words = max_words
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarize")
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._folded = 0
+        self._failed = 0
+
+    def maybe_schedule(self, session_id: str):
+        with self._lock:
+            if session_id in self._pending:
+                return
+            self._pending.add(session_id)
+        self._executor.submit(self._run, session_id)
+
+    def _run(self, session_id: str):
+        try:
+            summary, rows = self.store.get_turn_rows(session_id)
+            turns = [(query, answer) for _, query, answer in rows]
+            if len(turns) <= self.keep_turns or count_tokens(format_history(turns)) <= self.trigger_tokens:
+                return
+            folded = turns[:len(turns) - self.keep_turns]
+            new_summary = self.chain.invoke({
+                "summary": summary or "(none)",
+                "turns": format_history(folded),
+                "max_words": self.max_words
+            }).strip()
+            # Fold by the ids read above, so repeated question/answer pairs stay intact
+            folded_ids = [turn_id for turn_id, _, _ in rows[:len(folded)]]
+            if new_summary and self.store.fold(session_id, folded_ids, new_summary):
+                with self._lock:
+                    self._folded += len(folded)
+                logger.info("Folded %s turns into the session summary", len(folded))
+        except Exception as e:
+            with self._lock:
+                self._failed += 1
+            logger.error("Error summarizing conversation: %s", e)
+        finally:
+            with self._lock:
+                self._pending.discard(session_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": len(self._pending), "folded_turns": self._folded, "failed": self._failed}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
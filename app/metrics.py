@@ -0,0 +1,75 @@
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from request_context import current_request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "voicemate_stage_seconds",
+    "Latency of each pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    "voicemate_stage_errors_total",
+    "Exceptions raised inside a pipeline stage",
+    ["stage"]
+)
+REQUEST_SECONDS = Histogram(
+    "voicemate_request_seconds",
+    "End-to-end HTTP request latency",
+    ["route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    "voicemate_requests_in_flight",
+    "HTTP requests currently being handled",
+    ["route"],
+    multiprocess_mode="livesum"
+)
+AUDIO_SECONDS = Histogram(
+    "voicemate_audio_duration_seconds",
+    "Duration of decoded input audio",
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+)
+RESPONSE_BYTES = Histogram(
+    "voicemate_response_bytes",
+    "Size of HTTP response bodies",
+    ["route"],
+    buckets=(1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+)
+RETRIEVAL_PATHS = Counter(
+    "voicemate_retrieval_path_total",
+    "Retrieval decisions: retrieve, reuse, extend, follow_up or skip",
+    ["path"]
+)
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    request = current_request()
+    if request is not None:
+        request.add_stage(stage, seconds)
+
+@contextmanager
+def timed(stage: str):
+    """Time a block as a pipeline stage, counting exceptions that escape it"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+def render_metrics():
+    """Exposition body and content type, aggregated across workers under serve.py"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,41 @@
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+class RequestContext:
+    """Per-request bookkeeping filled in by the pipeline stages.
+
+    The context is stored in a ContextVar; WorkerPool runs jobs inside a copy
+    of the caller's context, so stages on worker threads update the same
+    object the request handler reads back.
+    """
+
+    def __init__(self, request_id: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex[:16]
+        self.started = time.monotonic()
+        self.prompt_tokens: Optional[dict] = None
+        self.retrieval_path: Optional[str] = None
+        self.stages: Dict[str, float] = {}
+
+    def add_stage(self, stage: str, seconds: float):
+        """Accumulate time spent in a stage; stages may run more than once"""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        """Stage breakdown formatted for the Server-Timing response header"""
+        return ", ".join(f"{stage};dur={1000 * seconds:.1f}" for stage, seconds in self.stages.items())
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+def begin_request(request_id: Optional[str] = None) -> RequestContext:
+    context = RequestContext(request_id)
+    _current.set(context)
+    return context
+
+def current_request() -> Optional[RequestContext]:
+    return _current.get()
+
+def current_request_id() -> Optional[str]:
+    context = _current.get()
+    return context.request_id if context is not None else None
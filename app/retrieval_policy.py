@@ -0,0 +1,163 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from metrics import RETRIEVAL_PATHS, timed
+from token_budget import count_tokens
+from config.logging import logger
+
+# Small talk that needs no context from the corpus
+CHITCHAT = re.compile(
+    r"^(hi|hello|hey|hiya|yo|thanks|thank you|thank you so much|thanks a lot|ok|okay|cool|great|nice|awesome|"
+    r"perfect|got it|i see|bye|goodbye|see you|good (morning|afternoon|evening|night)|how are you( doing)?|"
+    r"what'?s up|nice to meet you)( (harshil|there|again))?[\s!.?,]*$",
+    re.IGNORECASE
+)
+
+# Short follow-ups whose best context is what the previous turn retrieved
+FOLLOW_UP = re.compile(
+    r"^(tell me more|more|go on|continue|keep going|elaborate|can you elaborate|explain (that|it|more)|"
+    r"what else|and( then)?|why|how( so)?|really|such as|for example|like what)( about (it|that|this))?[\s!.?,]*$",
+    re.IGNORECASE
+)
+
+PATHS = ("retrieve", "reuse", "extend", "follow_up", "skip")
+
+def merge_overlapping(docs: List[Document], min_overlap: int, max_overlap: int = 200) -> List[Document]:
+    """Join chunks whose edges overlap and drop duplicate or contained chunks.
+
+    Neighbouring chunks from the splitter share up to `chunk_overlap`
+    characters; stitching them back together keeps the context in rank
+    order without repeating that text in the prompt.
+    """
+    merged: List[Document] = []
+    for doc in docs:
+        text = doc.page_content
+        for i, existing in enumerate(merged):
+            current = existing.page_content
+            if text in current:
+                break
+            if current in text:
+                merged[i] = Document(page_content=text, metadata=existing.metadata)
+                break
+            joined = _join(current, text, min_overlap, max_overlap) or _join(text, current, min_overlap, max_overlap)
+            if joined is not None:
+                merged[i] = Document(page_content=joined, metadata=existing.metadata)
+                break
+        else:
+            merged.append(doc)
+    return merged
+
+def _join(head: str, tail: str, min_overlap: int, max_overlap: int) -> Optional[str]:
+    for size in range(min(len(head), len(tail), max_overlap), min_overlap - 1, -1):
+        if head.endswith(tail[:size]):
+            return head + tail[size:]
+    return None
+
+class _SessionRetrieval:
+    __slots__ = ("vector", "docs")
+
+    def __init__(self, vector: np.ndarray, docs: List[Document]):
+        self.vector = vector
+        self.docs = docs
+
+class RetrievalPolicy:
+    """Decides per turn whether to query the vector store at all.
+
+    - Small talk skips retrieval.
+    - A short follow-up ("tell me more") reuses the previous turn's documents.
+    - A query whose embedding is within `reuse_threshold` cosine similarity
+      of the previous query reuses those documents; within
+      `extend_threshold` it retrieves again and puts the new documents
+      ahead of the previous ones, up to `max_docs`.
+    - Anything else retrieves normally.
+
+    The selected chunks are then merged where their edges overlap. The
+    previous turn's query vector and documents are kept per session in a
+    bounded LRU.
+    """
+
+    def __init__(self, retriever, embeddings, reuse_threshold: float, extend_threshold: float,
+                 merge_min_overlap: int, max_sessions: int, max_docs: int = 6):
+        self.retriever = retriever
+        self.embeddings = embeddings
+        self.reuse_threshold = reuse_threshold
+        self.extend_threshold = extend_threshold
+        self.merge_min_overlap = merge_min_overlap
+        self.max_sessions = max_sessions
+        self.max_docs = max_docs
+        self._sessions: "OrderedDict[str, _SessionRetrieval]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._paths = dict.fromkeys(PATHS, 0)
+        self._merge_tokens_saved = 0
+
+    def _previous(self, session_id: str) -> Optional[_SessionRetrieval]:
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                self._sessions.move_to_end(session_id)
+            return state
+
+    def _remember(self, session_id: str, vector: np.ndarray, docs: List[Document]):
+        with self._lock:
+            self._sessions[session_id] = _SessionRetrieval(vector, docs)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def _fetch(self, query: str) -> List[Document]:
+        # Includes the query embedding, which is also timed on its own
+        with timed("retrieval"):
+            return self.retriever.invoke(query)
+
+    def _choose(self, session_id: str, query: str) -> Tuple[str, List[Document]]:
+        if CHITCHAT.match(query):
+            return "skip", []
+
+        previous = self._previous(session_id)
+        if previous is not None and FOLLOW_UP.match(query):
+            return "follow_up", previous.docs
+
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        path, docs = "retrieve", None
+        if previous is not None:
+            similarity = float(vector @ previous.vector)
+            if similarity >= self.reuse_threshold:
+                path, docs = "reuse", previous.docs
+            elif similarity >= self.extend_threshold:
+                seen = {doc.page_content for doc in previous.docs}
+                fresh = [doc for doc in self._fetch(query) if doc.page_content not in seen]
+                path, docs = "extend", (fresh + previous.docs)[:self.max_docs]
+        if docs is None:
+            docs = self._fetch(query)
+        self._remember(session_id, vector, docs)
+        return path, docs
+
+    def retrieve(self, session_id: str, query: str) -> Tuple[List[Document], str]:
+        """Return (context documents, path taken) for this turn"""
+        path, docs = self._choose(session_id, query)
+        merged = merge_overlapping(docs, self.merge_min_overlap)
+        saved = count_tokens("\n\n".join(d.page_content for d in docs)) - count_tokens("\n\n".join(d.page_content for d in merged))
+        with self._lock:
+            self._paths[path] += 1
+            self._merge_tokens_saved += saved
+        RETRIEVAL_PATHS.labels(path).inc()
+        logger.info("Retrieval path: %s (%s chunks, %s after merging)", path, len(docs), len(merged))
+        return merged, path
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            paths = dict(self._paths)
+            return {
+                "paths": paths,
+                "retrievals_saved": paths["reuse"] + paths["follow_up"] + paths["skip"],
+                "merge_tokens_saved": self._merge_tokens_saved,
+                "sessions": len(self._sessions)
+            }
@@ -0,0 +1,87 @@
+import threading
+import time
+import numpy as np
+from typing import List, Optional
+
+class SemanticCache:
+    """Answer cache looked up by cosine similarity of query embeddings.
+
+    Embeddings are stored L2-normalized in one preallocated matrix, so a
+    lookup is a single matrix-vector product. When full, the least recently
+    used entry is overwritten. Entries are tied to a corpus version and the
+    whole cache is dropped as soon as a different version is seen.
+    """
+
+    def __init__(self, capacity: int, threshold: float):
+        self.capacity = capacity
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None
+        self._answers: List[Optional[str]] = [None] * capacity
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._size:
+                self._invalidations += 1
+            self._size = 0
+            self._answers = [None] * self.capacity
+            self._version = version
+
+    def lookup(self, vector, version) -> Optional[str]:
+        query = self._normalize(vector)
+        with self._lock:
+            self._check_version(version)
+            if self._size:
+                scores = self._vectors[:self._size] @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._hits += 1
+                    self._last_used[best] = time.monotonic()
+                    return self._answers[best]
+            self._misses += 1
+            return None
+
+    def store(self, vector, answer: str, version):
+        if self.capacity <= 0:
+            return
+        query = self._normalize(vector)
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None:
+                self._vectors = np.zeros((self.capacity, len(query)), dtype=np.float32)
+            if self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+            self._vectors[slot] = query
+            self._answers[slot] = answer
+            self._last_used[slot] = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+            self._answers = [None] * self.capacity
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": self._size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "invalidations": self._invalidations
+            }
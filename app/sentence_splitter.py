@@ -0,0 +1,42 @@
+import re
+from typing import List
+
+# Sentence end: terminal punctuation (optionally closed by a quote/bracket)
+# followed by whitespace, or a line break
+SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+|\n+')
+
+class SentenceSplitter:
+    """Cuts a stream of LLM tokens into sentences as soon as they complete.
+
+    Sentences shorter than `min_chars` are held back and merged with the next
+    one so TTS is not asked to synthesize fragments like "Sure." on their own.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        """Add a token and return any sentences it completed"""
+        self._buffer += token
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Return whatever text is left once the stream has ended"""
+        tail = self._buffer.strip()
+        self._buffer = ""
+        return [tail] if tail else []
+
+def split_sentences(text: str, min_chars: int = 20) -> List[str]:
+    """Split a complete text into sentences"""
+    splitter = SentenceSplitter(min_chars)
+    return splitter.feed(text) + splitter.flush()
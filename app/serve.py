@@ -0,0 +1,127 @@
+"""Multi-process server with models shared copy-on-write across workers.
+
+The master binds the listening socket and loads the PyTorch model weights
+once, then forks the workers. Each worker inherits the weights (the pages
+stay shared until written, and inference only reads them) and builds the
+rest of the pipeline in its own lifespan. Use session_backend=sqlite so any
+worker can serve any turn of a conversation.
+
+Run from the app directory:
+    python serve.py --workers 4 --port 8080
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+import uvicorn
+from config.setting import Config
+from config.logging import logger
+from startup import preload_models
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def mark_process_dead(pid: int):
+    """Drop a dead worker's live gauges from the shared metrics directory"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
+
+def run_worker(sock: socket.socket, log_level: str):
+    # Restore default handlers; uvicorn installs its own for graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="on", log_level=log_level))
+    server.run(sockets=[sock])
+
+class Supervisor:
+    """Forks the workers, respawns the ones that die and stops them on signal"""
+
+    def __init__(self, sock: socket.socket, workers: int, log_level: str):
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.children = set()
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(self.sock, self.log_level)
+            finally:
+                os._exit(0)
+        self.children.add(pid)
+        logger.info(f"Started worker {pid}")
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.discard(pid)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            self.children.discard(pid)
+            mark_process_dead(pid)
+            if not self.stopping:
+                logger.warning(f"Worker {pid} exited with status {status}, restarting")
+                time.sleep(1)
+                self.spawn()
+        logger.info("All workers stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=Config.serve_workers)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.workers > 1 and Config.session_backend.lower() == "memory":
+        logger.warning("session_backend=memory keeps conversations per worker; set SESSION_BACKEND=sqlite")
+
+    # Workers write metrics to a shared directory so /metrics can aggregate
+    # them; this must be set before prometheus_client is first imported
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="voicemate-metrics-")
+
+    sock = bind_socket(args.host, args.port)
+    preload_models()
+
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers don't touch (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+    Supervisor(sock, args.workers, args.log_level).run()
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, List, Tuple
+from config.setting import Config
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+def format_history(turns: List[Tuple[str, str]], summary: str = "") -> str:
+    """Render turns the way ConversationBufferWindowMemory formats its buffer"""
+    lines = [f"{SUMMARY_PREFIX}{summary}"] if summary else []
+    lines.extend(f"Human: {query}\nAI: {answer}" for query, answer in turns)
+    return "\n".join(lines)
+
+class _Session:
+    __slots__ = ("turns", "summary", "size", "last_access", "next_id")
+
+    def __init__(self, max_turns: int):
+        self.turns: Deque[Tuple[int, str, str]] = deque(maxlen=max_turns)
+        self.summary = ""
+        self.size = 0
+        self.last_access = time.monotonic()
+        self.next_id = 0
+
+class SessionMemoryStore:
+    """Per-session conversation memory with LRU eviction and idle-TTL expiry.
+
+    Sessions live in an OrderedDict kept in access order, so lookups are O(1)
+    and the least recently used (and therefore first to expire) sessions sit
+    at the front. The total UTF-8 size of stored text is capped by
+    `max_bytes`.
+    """
+
+    def __init__(self, max_sessions: int, max_turns: int, max_bytes: int, ttl_seconds: float):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._expired = 0
+
+    @staticmethod
+    def _text_size(text: str) -> int:
+        return len(text.encode("utf-8"))
+
+    def _turn_size(self, turn: Tuple[int, str, str]) -> int:
+        return self._text_size(turn[1]) + self._text_size(turn[2])
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id)
+        self._total_bytes -= session.size
+
+    def _expire(self, now: float):
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access < self.ttl_seconds:
+                break
+            self._drop(session_id)
+            self._expired += 1
+
+    def _touch(self, session_id: str, now: float):
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def get_memory(self, session_id: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Return the session's (summary, turns), oldest turn first"""
+        summary, rows = self.get_turn_rows(session_id)
+        return summary, [(query, answer) for _, query, answer in rows]
+
+    def get_turn_rows(self, session_id: str) -> Tuple[str, List[Tuple[int, str, str]]]:
+        """Return the session's (summary, [(turn id, query, answer)]), oldest turn first"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            session = self._touch(session_id, now)
+            if session is None:
+                return "", []
+            return session.summary, list(session.turns)
+
+    def get_history(self, session_id: str) -> str:
+        """Return the session's history formatted like ConversationBufferWindowMemory"""
+        summary, turns = self.get_memory(session_id)
+        return format_history(turns, summary)
+
+    def save_turn(self, session_id: str, query: str, answer: str):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            session = self._touch(session_id, now)
+            if session is None:
+                session = _Session(self.max_turns)
+                self._sessions[session_id] = session
+
+            if len(session.turns) == session.turns.maxlen:
+                dropped = self._turn_size(session.turns[0])
+                session.size -= dropped
+                self._total_bytes -= dropped
+            turn = (session.next_id, query, answer)
+            session.next_id += 1
+            session.turns.append(turn)
+            size = self._turn_size(turn)
+            session.size += size
+            self._total_bytes += size
+
+            # Evict least recently used sessions, never the one just written
+            while len(self._sessions) > 1 and (
+                len(self._sessions) > self.max_sessions or self._total_bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._sessions))
+                self._drop(oldest)
+                self._evicted += 1
+
+    def fold(self, session_id: str, turn_ids: List[int], summary: str) -> bool:
+        """Replace the turns with the given ids (the oldest ones) with a summary of them"""
+        folded = set(turn_ids)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            while session.turns and session.turns[0][0] in folded:
+                size = self._turn_size(session.turns.popleft())
+                session.size -= size
+                self._total_bytes -= size
+            delta = self._text_size(summary) - self._text_size(session.summary)
+            session.summary = summary
+            session.size += delta
+            self._total_bytes += delta
+            return True
+
+    def clear(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._drop(session_id)
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._total_bytes,
+                "evicted": self._evicted,
+                "expired": self._expired
+            }
+
+class SQLiteSessionStore:
+    """Conversation memory shared by every worker process through SQLite.
+
+    The database runs in WAL mode so readers never block the single writer,
+    and each thread keeps its own connection. Only the last `max_turns`
+    turns per session are kept; idle sessions older than the TTL and the
+    least recently used sessions beyond `max_sessions` are pruned
+    periodically on write.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, max_sessions: int, max_turns: int, ttl_seconds: float):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    last_access REAL NOT NULL,
+                    summary TEXT NOT NULL DEFAULT ''
+                );
+                CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);
+                CREATE TABLE IF NOT EXISTS turns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    answer TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, id);
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+            if "summary" not in columns:
+                conn.execute("ALTER TABLE sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+
+    def _connection(self) -> sqlite3.Connection:
+        # Keyed by pid too, so a forked worker never reuses its parent's handle
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_memory(self, session_id: str) -> Tuple[str, List[Tuple[str, str]]]:
+        summary, rows = self.get_turn_rows(session_id)
+        return summary, [(query, answer) for _, query, answer in rows]
+
+    def get_turn_rows(self, session_id: str) -> Tuple[str, List[Tuple[int, str, str]]]:
+        conn = self._connection()
+        row = conn.execute("SELECT last_access, summary FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None or time.time() - row[0] >= self.ttl_seconds:
+            return "", []
+        conn.execute("UPDATE sessions SET last_access = ? WHERE session_id = ?", (time.time(), session_id))
+        turns = conn.execute(
+            "SELECT id, query, answer FROM turns WHERE session_id = ? ORDER BY id",
+            (session_id,)
+        ).fetchall()
+        return row[1], [tuple(turn) for turn in turns]
+
+    def get_history(self, session_id: str) -> str:
+        summary, turns = self.get_memory(session_id)
+        return format_history(turns, summary)
+
+    def save_turn(self, session_id: str, query: str, answer: str):
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            expired = conn.execute(
+                "SELECT last_access FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if expired is not None and now - expired[0] >= self.ttl_seconds:
+                conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+                conn.execute("UPDATE sessions SET summary = '' WHERE session_id = ?", (session_id,))
+            conn.execute(
+                "INSERT INTO sessions (session_id, last_access) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET last_access = excluded.last_access",
+                (session_id, now)
+            )
+            conn.execute("INSERT INTO turns (session_id, query, answer) VALUES (?, ?, ?)", (session_id, query, answer))
+            conn.execute(
+                "DELETE FROM turns WHERE session_id = ? AND id NOT IN "
+                "(SELECT id FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, self.max_turns)
+            )
+
+        with self._writes_lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Drop expired sessions and the least recently used ones over the cap"""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM sessions WHERE last_access < ?", (time.time() - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM sessions WHERE session_id IN "
+                "(SELECT session_id FROM sessions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,)
+            )
+            conn.execute("DELETE FROM turns WHERE session_id NOT IN (SELECT session_id FROM sessions)")
+
+    def fold(self, session_id: str, turn_ids: List[int], summary: str) -> bool:
+        """Replace the turns with the given ids (the oldest ones) with a summary of them"""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            updated = conn.execute(
+                "UPDATE sessions SET summary = ? WHERE session_id = ?", (summary, session_id)
+            ).rowcount
+            conn.executemany(
+                "DELETE FROM turns WHERE session_id = ? AND id = ?",
+                [(session_id, turn_id) for turn_id in turn_ids]
+            )
+        return bool(updated)
+
+    def clear(self, session_id: str) -> bool:
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            deleted = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+        return bool(deleted)
+
+    def stats(self) -> dict:
+        conn = self._connection()
+        sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        turns = conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+        return {"backend": "sqlite", "sessions": sessions, "turns": turns}
+
+def create_session_store():
+    """Build the session store selected in the settings"""
+    if Config.session_backend.lower() == "sqlite":
+        return SQLiteSessionStore(
+            path=Config.session_db_path,
+            max_sessions=Config.session_max_sessions,
+            max_turns=Config.session_max_turns,
+            ttl_seconds=Config.session_ttl_seconds
+        )
+    return SessionMemoryStore(
+        max_sessions=Config.session_max_sessions,
+        max_turns=Config.session_max_turns,
+        max_bytes=Config.session_max_bytes,
+        ttl_seconds=Config.session_ttl_seconds
+    )
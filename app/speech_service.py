@@ -1,50 +1,132 @@
-import io
-import soundfile as sf
+import threading
 import numpy as np
-from typing import Tuple
-import whisper
-from gtts import gTTS
-from config.logging import logger
-from llm_service import LLMService
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterator, Tuple, Union
+from config.logging import logger, PAYLOAD
+from llm_service import LLMService, MSG_INVALID_QUESTION, MSG_NO_ANSWER, MSG_LLM_ERROR
+from sentence_splitter import SentenceSplitter, split_sentences
+from tts_engines import create_tts_engine
+from stt_backends import create_stt_backend
+from tts_cache import TTSCache
+from transcript_cache import TranscriptCache
+from audio_codec import AUDIO_FORMATS, encode_audio
+from audio_ingest import ingest_audio, AudioTooLargeError, WHISPER_SAMPLE_RATE
+from vad import EnergyVAD
+from metrics import AUDIO_SECONDS, timed
+from config.setting import Config
+
+MSG_NOT_UNDERSTOOD = "Sorry, I couldn't understand. Please try again."
+MSG_NOT_PROCESSED = "I couldn't process your question. Please try again."
+MSG_TTS_FAILED = "Failed to generate speech for the response."
+MSG_TECHNICAL_ERROR = "Technical error occurred. Please try again."
+
+# Fixed replies rendered at startup in every output format so failures never pay for synthesis
+CANNED_MESSAGES = (
+    MSG_NOT_UNDERSTOOD,
+    MSG_NOT_PROCESSED,
+    MSG_TTS_FAILED,
+    MSG_TECHNICAL_ERROR,
+    MSG_INVALID_QUESTION,
+    MSG_NO_ANSWER,
+    MSG_LLM_ERROR,
+)
 
 class SpeechService:
-    def __init__(self):
-        # Initialize Whisper for STT
+    def __init__(self, stt_backend=None, tts_engine=None, llm_service=None):
+        # Initialize the configured STT backend unless one was loaded already
         try:
-            self.whisper_model = whisper.load_model("base")
-            logger.info("Whisper model initialized")
+            self.stt_backend = stt_backend or create_stt_backend()
         except Exception as e:
-            logger.error(f"Failed to initialize Whisper: {str(e)}")
+            logger.error("Failed to initialize STT backend: %s", e)
             raise
         
+        # Trim silence before Whisper and skip it entirely for silent clips
+        self.vad = None
+        if Config.vad_enabled:
+            self.vad = EnergyVAD(
+                sample_rate=WHISPER_SAMPLE_RATE,
+                margin_db=Config.vad_margin_db,
+                speech_level_db=Config.vad_speech_level_db,
+                padding_ms=Config.vad_padding_ms,
+                max_pause_ms=Config.vad_max_pause_ms
+            )
+        self._vad_lock = threading.Lock()
+        self._vad_stats = {"clips": 0, "silent_clips": 0, "input_seconds": 0.0, "removed_seconds": 0.0}
+        
+        # Retried uploads of the same recording share one transcription
+        self.transcript_cache = TranscriptCache(
+            max_entries=Config.transcript_cache_size,
+            namespace=f"{self.stt_backend.name}:{Config.whisper_model_size}:{Config.vad_enabled}"
+        )
+        
+        # TTS engine plus a pool that synthesizes sentences of long answers in parallel
+        self.tts_engine = tts_engine or create_tts_engine()
+        self.synthesis_pool = ThreadPoolExecutor(max_workers=Config.tts_workers, thread_name_prefix="synth")
+        
+        # Synthesizes streamed sentences while the LLM keeps generating
+        self.tts_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tts")
+        
+        # Cache synthesized audio and pre-render fixed replies in the background
+        self.tts_cache = TTSCache(
+            max_memory_bytes=Config.tts_cache_memory_bytes,
+            disk_dir=Config.tts_cache_dir or None,
+            max_disk_bytes=Config.tts_cache_disk_bytes
+        )
+        for message in CANNED_MESSAGES:
+            self.tts_executor.submit(self.prerender_speech, message)
+        
         # Initialize LLM Service with memory
-        self.llm_service = LLMService()
+        self.llm_service = llm_service or LLMService()
         logger.info("Enhanced Speech service with memory initialized")
 
-    def transcribe_audio(self, audio_data: bytes) -> str:
-        """Convert audio to text using Whisper"""
+    def transcribe_audio(self, audio_data: Union[bytes, BinaryIO]) -> str:
+        """Convert uploaded audio (bytes or a seekable file) to text using Whisper"""
         try:
-            audio, sample_rate = sf.read(io.BytesIO(audio_data))
-            logger.info(f"Audio loaded: sr={sample_rate}, shape={audio.shape}")
-
-            audio = audio.astype(np.float32)
-
-            result = self.whisper_model.transcribe(
-                audio,
-                fp16=False,
-                language="en",
-                temperature=0.0,
-                best_of=1
-            )
-            
-            transcription = result["text"].strip()
-            logger.info(f"Transcription: '{transcription}'")
-            return transcription
+            with timed("ingest"):
+                audio = ingest_audio(audio_data, Config.max_upload_bytes, Config.max_audio_seconds)
+            AUDIO_SECONDS.observe(len(audio) / WHISPER_SAMPLE_RATE)
+            return self.transcript_cache.get_or_compute(audio, self._transcribe_clip)
             
+        except AudioTooLargeError:
+            raise
         except Exception as e:
-            logger.error(f"Transcription error: {str(e)}")
+            logger.error("Transcription error: %s", e)
             return ""
 
+    def _transcribe_clip(self, audio: np.ndarray) -> str:
+        if self.vad is not None:
+            with timed("vad"):
+                audio = self.trim_silence(audio)
+            if not len(audio):
+                logger.info("No speech detected, skipping Whisper")
+                return ""
+        return self.transcribe_pcm(audio)
+
+    def trim_silence(self, audio: np.ndarray) -> np.ndarray:
+        """Drop leading/trailing silence and compact long pauses"""
+        result = self.vad.process(audio)
+        with self._vad_lock:
+            self._vad_stats["clips"] += 1
+            self._vad_stats["silent_clips"] += 0 if result.has_speech else 1
+            self._vad_stats["input_seconds"] += len(audio) / WHISPER_SAMPLE_RATE
+            self._vad_stats["removed_seconds"] += result.removed_seconds
+        logger.info("VAD removed %.2fs of %.2fs", result.removed_seconds, len(audio) / WHISPER_SAMPLE_RATE)
+        return result.audio
+
+    def transcribe_pcm(self, audio: np.ndarray) -> str:
+        """Run the STT backend on 16 kHz float32 PCM samples"""
+        with timed("stt"):
+            transcription = self.stt_backend.transcribe(audio)
+
+        logger.info("Transcription: '%s'", transcription, extra=PAYLOAD)
+        return transcription
+
+    @staticmethod
+    def is_canned_reply(text: str) -> bool:
+        """Whether `text` is one of the fixed failure replies rather than an answer"""
+        return text in CANNED_MESSAGES
+
     def clean_text_for_tts(self, text: str) -> str:
         """Remove markdown and JSON formatting for TTS"""
         try:
@@ -57,12 +139,44 @@ class SpeechService:
             text = re.sub(r'[\{\}\[\]\:\"\,]+', ' ', text)
             return text.strip()
         except Exception as e:
-            logger.error(f"Text cleaning error: {str(e)}")
+            logger.error("Text cleaning error: %s", e)
             return text
 
 
-    def generate_speech(self, text: str) -> bytes:
-        """Convert text to speech using gTTS"""
+    def _tts_cache_key(self, clean_text: str, audio_format: str) -> str:
+        return TTSCache.make_key(
+            clean_text,
+            format=audio_format,
+            sample_rate=Config.tts_output_sample_rate,
+            **self.tts_engine.cache_params()
+        )
+
+    def _synthesize(self, clean_text: str) -> Tuple[np.ndarray, int]:
+        """Synthesize sentences in parallel and join the PCM once"""
+        with timed("tts"):
+            sentences = split_sentences(clean_text)
+            if len(sentences) > 1:
+                parts = list(self.synthesis_pool.map(self.tts_engine.synthesize, sentences))
+            else:
+                parts = [self.tts_engine.synthesize(clean_text)]
+            return np.concatenate([samples for samples, _ in parts]), parts[0][1]
+
+    def prerender_speech(self, text: str):
+        """Cache `text` in every output format, synthesizing it at most once"""
+        try:
+            clean_text = self.clean_text_for_tts(text)
+            keys = {fmt: self._tts_cache_key(clean_text, fmt) for fmt in AUDIO_FORMATS}
+            missing = [fmt for fmt, key in keys.items() if self.tts_cache.get(key) is None]
+            if not missing:
+                return
+            audio, sr = self._synthesize(clean_text)
+            for fmt in missing:
+                self.tts_cache.put(keys[fmt], encode_audio(audio, sr, fmt, Config.tts_output_sample_rate))
+        except Exception as e:
+            logger.error("Speech pre-rendering error: %s", e)
+
+    def generate_speech(self, text: str, audio_format: str = "wav") -> bytes:
+        """Convert text to speech with the configured engine, served from the TTS cache when possible"""
         try:
             if not text.strip():
                 return b""
@@ -71,56 +185,157 @@ class SpeechService:
             if not clean_text:
                 return b""
             
-            tts = gTTS(text=clean_text, lang='en', slow=False)
-            buffer = io.BytesIO()
-            tts.write_to_fp(buffer)
-            buffer.seek(0)
+            cache_key = self._tts_cache_key(clean_text, audio_format)
+            cached = self.tts_cache.get(cache_key)
+            if cached is not None:
+                return cached
             
-            # Convert to WAV format
-            audio, sr = sf.read(buffer)
-            if len(audio.shape) > 1:
-                audio = np.mean(audio, axis=1)
-            
-            output_buffer = io.BytesIO()
-            sf.write(output_buffer, audio, samplerate=sr, format="WAV")
-            
-            logger.info(f"Generated speech for: {text[:50]}...")
-            return output_buffer.getvalue()
+            audio, sr = self._synthesize(clean_text)
+            with timed("encode"):
+                audio_bytes = encode_audio(audio, sr, audio_format, Config.tts_output_sample_rate)
+            self.tts_cache.put(cache_key, audio_bytes)
+            logger.info("Generated speech for: %.50s...", text)
+            return audio_bytes
             
         except Exception as e:
-            logger.error(f"Speech generation error: {str(e)}")
+            logger.error("Speech generation error: %s", e)
             return b""
 
-    def process_voice_query(self, audio_data: bytes) -> Tuple[str, bytes]:
+    def process_voice_query(self, audio_data: Union[bytes, BinaryIO], session_id: str, audio_format: str = "wav") -> Tuple[str, bytes]:
         """Main processing pipeline with conversation memory"""
         try:
             # Step 1: Speech to Text
             query = self.transcribe_audio(audio_data)
+            return self.respond_to_query(query, session_id, audio_format)
+            
+        except AudioTooLargeError:
+            raise
+        except Exception as e:
+            logger.error("Voice processing error: %s", e)
+            error_msg = MSG_TECHNICAL_ERROR
+            return error_msg, self.generate_speech(error_msg, audio_format)
+
+    def respond_to_query(self, query: str, session_id: str, audio_format: str = "wav") -> Tuple[str, bytes]:
+        """Answer a transcribed query and synthesize the reply"""
+        try:
             if not query:
-                error_msg = "Sorry, I couldn't understand. Please try again."
-                return error_msg, self.generate_speech(error_msg)
+                error_msg = MSG_NOT_UNDERSTOOD
+                return error_msg, self.generate_speech(error_msg, audio_format)
             
             # Step 2: Process with LLM (now with memory)
-            response = self.llm_service.process_query(query)
-            if not response:
-                error_msg = "I couldn't process your question. Please try again."
-                return error_msg, self.generate_speech(error_msg)
+            response = self.llm_service.process_query(query, session_id)
+            return self.speak_response(response, audio_format)
             
-            # Step 3: Text to Speech
-            audio_response = self.generate_speech(response)
-            if not audio_response:
-                error_msg = "Failed to generate speech for the response."
-                return response, self.generate_speech(error_msg)
+        except Exception as e:
+            logger.error("Voice processing error: %s", e)
+            error_msg = MSG_TECHNICAL_ERROR
+            return error_msg, self.generate_speech(error_msg, audio_format)
+    
+    def speak_response(self, response: str, audio_format: str = "wav") -> Tuple[str, bytes]:
+        """Synthesize the LLM reply, falling back to canned messages"""
+        if not response:
+            error_msg = MSG_NOT_PROCESSED
+            return error_msg, self.generate_speech(error_msg, audio_format)
+        
+        # Step 3: Text to Speech
+        audio_response = self.generate_speech(response, audio_format)
+        if not audio_response:
+            error_msg = MSG_TTS_FAILED
+            return response, self.generate_speech(error_msg, audio_format)
+        
+        logger.info("Voice query with memory processed successfully")
+        return response, audio_response
+    
+    async def aprocess_voice_query(self, audio_data: Union[bytes, BinaryIO], session_id: str, audio_format: str, run_blocking) -> Tuple[str, bytes]:
+        """Pipeline with the LLM call awaited on the event loop.
+
+        Transcription, memory and retrieval, and synthesis run through
+        `run_blocking` (a worker pool reservation), so no worker thread sits
+        idle while the provider responds.
+        """
+        try:
+            query = await run_blocking(self.transcribe_audio, audio_data)
+            if not query:
+                error_msg = MSG_NOT_UNDERSTOOD
+                return error_msg, await run_blocking(self.generate_speech, error_msg, audio_format)
             
-            logger.info("Voice query with memory processed successfully")
-            return response, audio_response
+            response = await self.llm_service.aprocess_query(query, session_id, run_blocking)
+            return await run_blocking(self.speak_response, response, audio_format)
             
+        except AudioTooLargeError:
+            raise
         except Exception as e:
-            logger.error(f"Voice processing error: {str(e)}")
-            error_msg = "Technical error occurred. Please try again."
-            return error_msg, self.generate_speech(error_msg)
+            logger.error("Voice processing error: %s", e)
+            error_msg = MSG_TECHNICAL_ERROR
+            return error_msg, await run_blocking(self.generate_speech, error_msg, audio_format)
     
-    def clear_conversation_memory(self):
-        """Clear conversation history"""
-        self.llm_service.clear_memory()
+    def stream_voice_query(self, audio_data: Union[bytes, BinaryIO], session_id: str) -> Iterator[dict]:
+        """Streaming pipeline: transcript first, then one audio chunk per sentence"""
+        query = self.transcribe_audio(audio_data)
+        yield {"type": "transcript", "text": query}
+        yield from self.stream_response(query, session_id)
+
+    def stream_response(self, query: str, session_id: str) -> Iterator[dict]:
+        """Stream LLM tokens, cut them into sentences and synthesize each one.
+
+        Sentences are handed to the TTS pool as soon as they complete, so
+        synthesis overlaps with generation; chunks are still emitted in order.
+        """
+        if not query:
+            error_msg = MSG_NOT_UNDERSTOOD
+            yield {"type": "sentence", "index": 0, "text": error_msg, "audio": self.generate_speech(error_msg)}
+            yield {"type": "done", "response_text": error_msg}
+            return
+        
+        splitter = SentenceSplitter()
+        pending = deque()
+        sentences = []
+        
+        def submit(sentence_text):
+            sentences.append(sentence_text)
+            pending.append((len(sentences) - 1, sentence_text, self.tts_executor.submit(self.generate_speech, sentence_text)))
+        
+        def emit(index, sentence_text, future):
+            return {"type": "sentence", "index": index, "text": sentence_text, "audio": future.result()}
+        
+        try:
+            for token in self.llm_service.stream_query(query, session_id):
+                for sentence in splitter.feed(token):
+                    submit(sentence)
+                while pending and pending[0][2].done():
+                    yield emit(*pending.popleft())
+            
+            for sentence in splitter.flush():
+                submit(sentence)
+            while pending:
+                yield emit(*pending.popleft())
+            
+            logger.info("Streamed response in %s sentence chunks", len(sentences))
+            yield {"type": "done", "response_text": " ".join(sentences)}
+            
+        except Exception as e:
+            logger.error("Streaming response error: %s", e)
+            error_msg = MSG_TECHNICAL_ERROR
+            yield {"type": "error", "text": error_msg, "audio": self.generate_speech(error_msg)}
+    
+    def stats(self) -> dict:
+        """Runtime statistics for the speech pipeline"""
+        return {
+            "stt": self.stt_backend.stats(),
+            "tts_cache": self.tts_cache.stats(),
+            "vad": dict(self._vad_stats),
+            "transcript_cache": self.transcript_cache.stats(),
+            **self.llm_service.stats()
+        }
+
+    def close(self):
+        """Stop background threads owned by the pipeline"""
+        self.stt_backend.close()
+        self.tts_executor.shutdown(wait=False, cancel_futures=True)
+        self.synthesis_pool.shutdown(wait=False, cancel_futures=True)
+        self.llm_service.close()
+
+    def clear_conversation_memory(self, session_id: str):
+        """Clear conversation history for a session"""
+        self.llm_service.clear_memory(session_id)
         logger.info("Conversation memory cleared via SpeechService")
\ No newline at end of file
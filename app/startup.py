@@ -0,0 +1,156 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from config.setting import Config
+from config.logging import logger
+
+# Models loaded once per process, and inherited by forked workers
+_shared_models: Dict[tuple, object] = {}
+_shared_model_locks: Dict[tuple, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+def shared_model(key: tuple, factory: Callable):
+    """Return the model registered under `key`, building it on first use"""
+    with _registry_lock:
+        lock = _shared_model_locks.setdefault(key, threading.Lock())
+    # Per-key lock so different models can still load in parallel
+    with lock:
+        if key not in _shared_models:
+            _shared_models[key] = factory()
+        return _shared_models[key]
+
+def preload_models():
+    """Load the PyTorch model weights before forking workers.
+
+    Only plain PyTorch models are preloaded: runtimes that start their own
+    native thread pools at load time (CTranslate2, ONNX Runtime) would be
+    left with dead threads in the children, so those still load per worker.
+    """
+    started = time.perf_counter()
+    if Config.stt_backend.lower() == "whisper":
+        import whisper
+        shared_model(("whisper", Config.whisper_model_size), lambda: whisper.load_model(Config.whisper_model_size))
+    if Config.embedding_runtime.lower() in ("torch", "int8"):
+        from vector_store import load_sentence_transformer
+        load_sentence_transformer("all-MiniLM-L6-v2", Config.embedding_runtime.lower())
+    logger.info(f"Preloaded models in {time.perf_counter() - started:.2f}s")
+
+def _load_stt():
+    from stt_backends import create_stt_backend
+    return create_stt_backend()
+
+def _load_tts():
+    from tts_engines import create_tts_engine
+    return create_tts_engine()
+
+def _load_llm():
+    from llm_service import LLMService
+    return LLMService()
+
+class PipelineLoader:
+    """Loads the pipeline components concurrently and tracks their readiness.
+
+    Whisper, the TTS engine and the LLM service (SentenceTransformer plus the
+    vector store client) are independent, so they are built on separate
+    threads. Heavy libraries are only imported inside those threads, which
+    keeps importing the web app itself cheap. Components that fail are
+    retried with exponential backoff; once the attempts run out the loader
+    is marked failed, which the liveness probe reports so the process gets
+    restarted.
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Callable]] = None):
+        # Component factories can be swapped, e.g. for the offline benchmark fakes
+        self.factories = {"stt": _load_stt, "tts": _load_tts, "llm": _load_llm, **(factories or {})}
+        self.components: Dict[str, str] = {"stt": "pending", "tts": "pending", "llm": "pending"}
+        self.speech_service = None
+        self.load_seconds = None
+        self.failed = False
+        self.error: Optional[str] = None
+        self._built: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def _set(self, name: str, status: str):
+        with self._lock:
+            self.components[name] = status
+
+    def _load_component(self, name: str, factory: Callable):
+        self._set(name, "loading")
+        started = time.perf_counter()
+        try:
+            component = factory()
+        except Exception as e:
+            self._set(name, "failed")
+            logger.error(f"Failed to load {name}: {str(e)}")
+            raise
+        self._set(name, "ready")
+        logger.info(f"Loaded {name} in {time.perf_counter() - started:.2f}s")
+        return component
+
+    def _build(self):
+        """Build the components not loaded yet in parallel, raising the first failure"""
+        pending = [name for name in ("stt", "tts", "llm") if name not in self._built]
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="startup") as pool:
+            futures = {name: pool.submit(self._load_component, name, self.factories[name]) for name in pending}
+        errors = []
+        for name, future in futures.items():
+            try:
+                self._built[name] = future.result()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+        from speech_service import SpeechService
+
+        return SpeechService(
+            stt_backend=self._built["stt"],
+            tts_engine=self._built["tts"],
+            llm_service=self._built["llm"]
+        )
+
+    def load(self, attempts: int = 1, backoff_seconds: float = 0.0):
+        """Build every component in parallel and assemble the SpeechService,
+        retrying failed components up to `attempts` times in total
+        """
+        if self.speech_service is not None:
+            return self.speech_service
+
+        started = time.perf_counter()
+        for attempt in range(1, attempts + 1):
+            try:
+                self.speech_service = self._build()
+                break
+            except Exception as e:
+                if attempt == attempts or self._stopping.is_set():
+                    self.failed = True
+                    self.error = str(e)
+                    raise
+                delay = backoff_seconds * 2 ** (attempt - 1)
+                logger.warning("Pipeline load attempt %d/%d failed, retrying in %.1fs: %s", attempt, attempts, delay, e)
+                if self._stopping.wait(delay):
+                    raise
+        self.load_seconds = time.perf_counter() - started
+        logger.info(f"Pipeline ready in {self.load_seconds:.2f}s")
+        return self.speech_service
+
+    def stop(self):
+        """Stop waiting between retries, e.g. on shutdown"""
+        self._stopping.set()
+
+    @property
+    def ready(self) -> bool:
+        return self.speech_service is not None
+
+    def status(self) -> dict:
+        with self._lock:
+            components = dict(self.components)
+        return {
+            "ready": self.ready,
+            "failed": self.failed,
+            "error": self.error,
+            "components": components,
+            "load_seconds": self.load_seconds
+        }
@@ -0,0 +1,145 @@
+import threading
+import numpy as np
+from typing import Callable, List
+from config.logging import logger, PAYLOAD
+
+STREAM_SAMPLE_RATE = 16000
+FRAME_SAMPLES = 320  # 20 ms frames at 16 kHz
+
+class StreamingTranscriber:
+    """Incremental Whisper transcription over a sliding window of live PCM.
+
+    Audio arrives as 16 kHz mono int16 chunks. `add_chunk` only buffers and
+    tracks speech/silence, so it is cheap enough for the event loop. The
+    blocking Whisper passes happen in `update_partial` and `finalize`, which
+    are meant to run on a pipeline worker.
+
+    Whenever the speaker pauses, the audio before the pause is transcribed
+    once and committed, so the window that is re-decoded for partials and the
+    final pass after end-of-speech only cover the current phrase.
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[[np.ndarray], str],
+        window_seconds: float,
+        step_seconds: float,
+        pause_ms: int,
+        endpoint_ms: int,
+        silence_rms: float
+    ):
+        self._transcribe = transcribe
+        self.window_samples = int(window_seconds * STREAM_SAMPLE_RATE)
+        self.step_samples = int(step_seconds * STREAM_SAMPLE_RATE)
+        self.pause_samples = int(pause_ms * STREAM_SAMPLE_RATE / 1000)
+        self.endpoint_samples = int(endpoint_ms * STREAM_SAMPLE_RATE / 1000)
+        self.min_commit_samples = STREAM_SAMPLE_RATE
+        self.silence_rms = silence_rms
+
+        self._lock = threading.Lock()
+        self._chunks: List[np.ndarray] = []
+        self._samples = 0              # uncommitted samples buffered
+        self._remainder = np.empty(0, dtype=np.float32)
+        self._pause_points: List[int] = []
+        self._silence_run = 0
+        self._pause_marked = False
+        self._heard_speech = False
+        self._last_partial_at = 0
+        self._committed: List[str] = []
+
+    def add_chunk(self, chunk: bytes):
+        """Buffer a chunk of int16 PCM and update speech/silence tracking"""
+        samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32) / 32768.0
+        if not len(samples):
+            return
+
+        with self._lock:
+            start = self._samples - len(self._remainder)
+            self._chunks.append(samples)
+            self._samples += len(samples)
+
+            # Frame energies over the unframed remainder plus the new chunk
+            framed = np.concatenate((self._remainder, samples))
+            n_frames = len(framed) // FRAME_SAMPLES
+            self._remainder = framed[n_frames * FRAME_SAMPLES:]
+            if not n_frames:
+                return
+            frames = framed[:n_frames * FRAME_SAMPLES].reshape(n_frames, FRAME_SAMPLES)
+            voiced = np.sqrt(np.mean(frames * frames, axis=1)) >= self.silence_rms
+
+            for i, is_voiced in enumerate(voiced):
+                if is_voiced:
+                    self._heard_speech = True
+                    self._silence_run = 0
+                    self._pause_marked = False
+                    continue
+                self._silence_run += FRAME_SAMPLES
+                if self._heard_speech and not self._pause_marked and self._silence_run >= self.pause_samples:
+                    # Commit boundary in the middle of the pause
+                    frame_end = start + (i + 1) * FRAME_SAMPLES
+                    self._pause_points.append(frame_end - self._silence_run // 2)
+                    self._pause_marked = True
+
+    @property
+    def end_of_speech(self) -> bool:
+        return self._heard_speech and self._silence_run >= self.endpoint_samples
+
+    def partial_due(self) -> bool:
+        return self._heard_speech and self._samples - self._last_partial_at >= self.step_samples
+
+    def _snapshot(self) -> np.ndarray:
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.empty(0, dtype=np.float32)
+
+    def _commit_point(self, length: int) -> int:
+        candidates = [p for p in self._pause_points if self.min_commit_samples <= p <= length]
+        if candidates:
+            return candidates[-1]
+        if length > self.window_samples:
+            return self.window_samples
+        return 0
+
+    def _drop_head(self, cut: int):
+        audio = self._snapshot()
+        self._chunks = [audio[cut:]]
+        self._samples -= cut
+        self._last_partial_at = max(0, self._last_partial_at - cut)
+        self._pause_points = [p - cut for p in self._pause_points if p > cut]
+
+    def _text(self, tail: str = "") -> str:
+        return " ".join(t for t in self._committed + [tail] if t)
+
+    def update_partial(self) -> str:
+        """Commit any completed phrase and re-decode the current window"""
+        with self._lock:
+            audio = self._snapshot()
+            cut = self._commit_point(len(audio))
+            self._last_partial_at = self._samples
+
+        if cut:
+            head_text = self._transcribe(audio[:cut])
+            with self._lock:
+                self._drop_head(cut)
+                self._committed.append(head_text)
+            audio = audio[cut:]
+
+        tail_text = self._transcribe(audio) if len(audio) >= self.step_samples else ""
+        return self._text(tail_text)
+
+    def finalize(self) -> str:
+        """Transcribe whatever has not been committed and return the full text"""
+        with self._lock:
+            audio = self._snapshot()
+            trailing = min(self._silence_run, len(audio))
+            heard_speech = self._heard_speech
+            self._chunks = []
+            self._samples = 0
+            self._pause_points = []
+
+        if trailing:
+            audio = audio[:len(audio) - trailing]
+        tail_text = self._transcribe(audio) if heard_speech and len(audio) else ""
+        transcript = self._text(tail_text)
+        logger.info("Streaming transcript finalized: '%s'", transcript, extra=PAYLOAD)
+        return transcript
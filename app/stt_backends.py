@@ -0,0 +1,142 @@
+import threading
+import time
+import numpy as np
+from startup import shared_model
+from config.setting import Config
+from config.logging import logger
+
+STT_SAMPLE_RATE = 16000
+
+class STTBackend:
+    """Speech-to-text backend over 16 kHz mono float32 PCM.
+
+    Subclasses implement `_transcribe`; this base class tracks the
+    real-time factor (compute seconds per second of audio) of every call.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self._calls = 0
+        self._audio_seconds = 0.0
+        self._compute_seconds = 0.0
+
+    def _transcribe(self, audio: np.ndarray) -> str:
+        raise NotImplementedError
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        started = time.perf_counter()
+        text = self._transcribe(audio)
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._calls += 1
+            self._audio_seconds += len(audio) / STT_SAMPLE_RATE
+            self._compute_seconds += elapsed
+        return text
+
+    def warm_up(self, seconds: float = 2.0):
+        """Run one inference on synthetic audio so the first request skips one-time costs"""
+        t = np.arange(int(seconds * STT_SAMPLE_RATE), dtype=np.float32) / STT_SAMPLE_RATE
+        audio = (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+        started = time.perf_counter()
+        self._transcribe(audio)
+        logger.info(f"{self.name} warm-up took {time.perf_counter() - started:.2f}s")
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "backend": self.name,
+                "calls": self._calls,
+                "audio_seconds": self._audio_seconds,
+                "compute_seconds": self._compute_seconds,
+                "real_time_factor": self._compute_seconds / self._audio_seconds if self._audio_seconds else 0.0
+            }
+
+    def close(self):
+        pass
+
+class WhisperBackend(STTBackend):
+    """Reference openai-whisper on PyTorch, optionally micro-batched"""
+
+    name = "whisper"
+
+    def __init__(self, model_size: str, threads: int, batching: bool):
+        super().__init__()
+        import torch
+        import whisper
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = shared_model(("whisper", model_size), lambda: whisper.load_model(model_size))
+        self.batcher = None
+        if batching:
+            from whisper_batcher import WhisperBatcher
+
+            # Batch concurrent transcriptions into shared forward passes
+            self.batcher = WhisperBatcher(
+                self.model,
+                max_batch_size=Config.whisper_max_batch_size,
+                max_wait_ms=Config.whisper_max_wait_ms
+            )
+
+    def _transcribe(self, audio: np.ndarray) -> str:
+        if self.batcher is not None:
+            return self.batcher.transcribe(audio)
+        result = self.model.transcribe(
+            audio,
+            fp16=False,
+            language="en",
+            temperature=0.0,
+            best_of=1
+        )
+        return result["text"].strip()
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["batcher"] = self.batcher.stats() if self.batcher else None
+        return stats
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+class FasterWhisperBackend(STTBackend):
+    """CTranslate2 Whisper (faster-whisper) with quantized CPU compute"""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_size: str, threads: int, compute_type: str):
+        super().__init__()
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(
+            model_size,
+            device="cpu",
+            compute_type=compute_type,
+            cpu_threads=threads
+        )
+
+    def _transcribe(self, audio: np.ndarray) -> str:
+        segments, _ = self.model.transcribe(
+            audio,
+            language="en",
+            beam_size=1,
+            temperature=0.0
+        )
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+def create_stt_backend() -> STTBackend:
+    """Build, and optionally warm up, the STT backend selected in the settings"""
+    backend = Config.stt_backend.lower()
+    if backend == "whisper":
+        stt_backend = WhisperBackend(Config.whisper_model_size, Config.stt_threads, Config.whisper_batching)
+    elif backend == "faster-whisper":
+        stt_backend = FasterWhisperBackend(Config.whisper_model_size, Config.stt_threads, Config.stt_compute_type)
+    else:
+        raise ValueError(f"Unknown STT backend: {Config.stt_backend}")
+
+    logger.info(f"STT backend initialized: {stt_backend.name} ({Config.whisper_model_size})")
+    if Config.stt_warmup:
+        stt_backend.warm_up()
+    return stt_backend
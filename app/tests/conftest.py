@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# The app runs as a flat module directory (`uvicorn main:app` from app/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Settings require a key at import time; the tests never call the provider
+os.environ.setdefault("GROQ_API_KEY", "test")
+# Keep the test run's log files out of the source tree
+os.environ.setdefault("LOG_DIR", os.path.join(tempfile.gettempdir(), "voicemate-test-logs"))
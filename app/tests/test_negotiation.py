@@ -0,0 +1,46 @@
+import pytest
+from starlette.requests import Request
+from main import negotiate_response, parse_accept
+
+def make_request(accept=None, query=""):
+    headers = [(b"accept", accept.encode("latin-1"))] if accept is not None else []
+    return Request({"type": "http", "method": "POST", "path": "/process_voice", "headers": headers, "query_string": query.encode("ascii")})
+
+@pytest.mark.parametrize("accept, query, expected", [
+    # Legacy clients get JSON with base64 WAV
+    (None, "", ("json", "wav")),
+    ("", "", ("json", "wav")),
+    ("application/json", "", ("json", "wav")),
+    ("*/*", "", ("json", "wav")),
+    ("application/*", "", ("json", "wav")),
+    ("text/html, */*;q=0.8", "", ("json", "wav")),
+    # Audio types and the audio wildcard
+    ("audio/*", "", ("binary", "wav")),
+    ("audio/flac", "", ("binary", "flac")),
+    ("audio/ogg; codecs=opus", "", ("binary", "opus")),
+    ("audio/opus", "", ("binary", "opus")),
+    ("audio/*, application/json;q=0.5", "", ("binary", "wav")),
+    # q-values order the entries and q=0 excludes one
+    ("application/json;q=0.5, audio/flac", "", ("binary", "flac")),
+    ("audio/flac;q=0.2, application/json;q=0.9", "", ("json", "wav")),
+    ("audio/flac;q=0, */*", "", ("json", "wav")),
+    ("audio/*;q=0", "", ("json", "wav")),
+    # Multipart
+    ("multipart/mixed", "", ("multipart", "wav")),
+    ("multipart/*", "", ("multipart", "wav")),
+    ("audio/wav;q=0.5, multipart/mixed", "", ("multipart", "wav")),
+    # The format query parameter overrides the codec, not the mode
+    ("multipart/mixed", "format=flac", ("multipart", "flac")),
+    ("audio/wav", "format=opus", ("binary", "opus")),
+    (None, "format=ogg", ("json", "ogg")),
+    ("audio/flac", "format=mp3", ("binary", "flac")),
+])
+def test_negotiate_response(accept, query, expected):
+    assert negotiate_response(make_request(accept, query)) == expected
+
+def test_parse_accept_orders_by_q_and_keeps_header_order_on_ties():
+    entries = parse_accept('audio/ogg;q=0.5;codecs="opus", audio/wav, audio/flac, text/plain;q=0')
+    assert entries == [("audio/wav", {}), ("audio/flac", {}), ("audio/ogg", {"codecs": "opus"})]
+
+def test_parse_accept_treats_invalid_q_as_one():
+    assert parse_accept("audio/flac;q=high") == [("audio/flac", {})]
@@ -0,0 +1,100 @@
+import pytest
+import session_store
+from session_store import SessionMemoryStore, SQLiteSessionStore
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, "monotonic", clock)
+    monkeypatch.setattr(session_store.time, "time", clock)
+    return clock
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, clock):
+    if request.param == "memory":
+        return SessionMemoryStore(max_sessions=100, max_turns=3, max_bytes=1 << 20, ttl_seconds=60)
+    return SQLiteSessionStore(path=str(tmp_path / "sessions.db"), max_sessions=100, max_turns=3, ttl_seconds=60)
+
+def test_keeps_the_last_turns_oldest_first(store):
+    for i in range(5):
+        store.save_turn("s", f"q{i}", f"a{i}")
+    assert store.get_memory("s") == ("", [("q2", "a2"), ("q3", "a3"), ("q4", "a4")])
+    assert store.get_memory("other") == ("", [])
+
+def test_fold_removes_only_the_given_turns(store):
+    # Identical turns must not be folded by text
+    for _ in range(2):
+        store.save_turn("s", "hello", "hi")
+    _, rows = store.get_turn_rows("s")
+    store.save_turn("s", "hello", "hi")
+
+    assert store.fold("s", [turn_id for turn_id, _, _ in rows], "greeted twice")
+    assert store.get_memory("s") == ("greeted twice", [("hello", "hi")])
+    assert "greeted twice" in store.get_history("s")
+    assert not store.fold("missing", [], "nothing")
+
+def test_clear_forgets_the_session(store):
+    store.save_turn("s", "q", "a")
+    assert store.clear("s")
+    assert store.get_memory("s") == ("", [])
+    assert not store.clear("s")
+
+def test_idle_sessions_expire(store, clock):
+    store.save_turn("s", "q", "a")
+    clock.now += 59
+    assert store.get_memory("s")[1] == [("q", "a")]
+    clock.now += 60
+    assert store.get_memory("s") == ("", [])
+    store.save_turn("s", "q2", "a2")
+    assert store.get_memory("s") == ("", [("q2", "a2")])
+
+def test_memory_store_evicts_least_recently_used_sessions(clock):
+    store = SessionMemoryStore(max_sessions=2, max_turns=3, max_bytes=1 << 20, ttl_seconds=60)
+    store.save_turn("a", "q", "a")
+    store.save_turn("b", "q", "a")
+    store.get_memory("a")
+    store.save_turn("c", "q", "a")
+
+    assert store.get_memory("b") == ("", [])
+    assert store.get_memory("a")[1] and store.get_memory("c")[1]
+    assert store.stats()["evicted"] == 1
+
+def test_memory_store_caps_utf8_bytes(clock):
+    store = SessionMemoryStore(max_sessions=100, max_turns=3, max_bytes=20, ttl_seconds=60)
+    store.save_turn("a", "é" * 5, "")
+    assert store.stats()["bytes"] == 10
+    store.save_turn("b", "é" * 5, "")
+    store.save_turn("c", "x", "")
+
+    assert store.get_memory("a") == ("", [])
+    assert store.stats()["bytes"] == 11
+    store.fold("b", [0], "ü")
+    assert store.stats()["bytes"] == 3
+
+def test_memory_store_counts_expired_sessions(clock):
+    store = SessionMemoryStore(max_sessions=100, max_turns=3, max_bytes=1 << 20, ttl_seconds=60)
+    store.save_turn("a", "q", "a")
+    clock.now += 61
+    store.save_turn("b", "q", "a")
+    assert store.stats()["expired"] == 1
+    assert store.stats()["sessions"] == 1
+
+def test_sqlite_prune_drops_expired_and_least_recently_used(tmp_path, clock):
+    store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"), max_sessions=2, max_turns=3, ttl_seconds=60)
+    store.save_turn("old", "q", "a")
+    clock.now += 61
+    for session_id in ("a", "b", "c"):
+        clock.now += 1
+        store.save_turn(session_id, "q", "a")
+    store.prune()
+
+    assert store.stats() == {"backend": "sqlite", "sessions": 2, "turns": 2}
+    assert store.get_memory("a") == ("", [])
+    assert store.get_memory("c")[1] == [("q", "a")]
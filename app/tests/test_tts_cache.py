@@ -0,0 +1,41 @@
+import os
+import time
+from tts_cache import TTSCache
+
+def _files(disk_dir):
+    return sorted(name[:-len(".bin")] for _, _, names in os.walk(disk_dir) for name in names if name.endswith(".bin"))
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=300)
+    for key in ("aa1", "bb2", "cc3"):
+        cache.put(key, b"x" * 100)
+
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get("aa1") == b"x" * 100
+    cache.put("dd4", b"x" * 100)
+
+    assert _files(tmp_path) == ["aa1", "cc3", "dd4"]
+    assert cache.get("bb2") is None
+    stats = cache.stats()
+    assert stats["disk_bytes"] == 300
+    assert stats["disk_evictions"] == 1
+
+def test_disk_tier_trims_existing_files_by_mtime_on_start(tmp_path):
+    cache = TTSCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=1000)
+    now = time.time()
+    for age, key in enumerate(("new", "mid", "old")):
+        cache.put(key, b"x" * 100)
+        os.utime(cache._path(key), (now - age * 60, now - age * 60))
+
+    restarted = TTSCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=200)
+
+    assert _files(tmp_path) == ["mid", "new"]
+    assert restarted.stats()["disk_bytes"] == 200
+
+def test_disk_tier_skips_entries_larger_than_the_limit(tmp_path):
+    cache = TTSCache(max_memory_bytes=0, disk_dir=str(tmp_path), max_disk_bytes=50)
+    cache.put("small", b"x" * 10)
+    cache.put("large", b"x" * 100)
+
+    assert _files(tmp_path) == ["small"]
+    assert cache.get("large") is None
@@ -0,0 +1,58 @@
+import numpy as np
+from vad import EnergyVAD
+
+SAMPLE_RATE = 16000
+
+def voiced(seconds, level=0.1):
+    t = np.arange(int(seconds * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+    return (level * sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 6))).astype(np.float32)
+
+def silence(seconds, level=0.0, seed=0):
+    noise = np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE))
+    return (level * noise).astype(np.float32)
+
+def test_empty_and_silent_clips_have_no_speech():
+    vad = EnergyVAD()
+    for audio in (np.zeros(0, np.float32), np.zeros(SAMPLE_RATE, np.float32), silence(2.0, level=1e-4)):
+        result = vad.process(audio)
+        assert not result.has_speech
+        assert len(result.audio) == 0
+        assert result.removed_seconds == len(audio) / SAMPLE_RATE
+
+def test_trims_padding_and_shortens_pauses():
+    vad = EnergyVAD(padding_ms=210, max_pause_ms=510)
+    floor = 1e-3
+    audio = np.concatenate([
+        silence(1.0, floor, seed=1), voiced(1.0), silence(2.0, floor, seed=2), voiced(1.0), silence(1.0, floor, seed=3)
+    ])
+    result = vad.process(audio)
+
+    assert abs(result.speech_seconds - 2.0) < 0.1
+    # Two voiced seconds, padding around each burst, and a pause cut to 0.51 s
+    kept = len(result.audio) / SAMPLE_RATE
+    assert 2.0 < kept < 2.0 + 4 * 0.21 + 0.51 + 0.1
+    assert abs(result.removed_seconds - (6.0 - kept)) < 0.05
+    # Leading silence is dropped down to the padding before the first burst
+    assert np.abs(result.audio[:int(0.21 * SAMPLE_RATE)]).max() < 0.01
+    assert np.abs(result.audio[int(0.21 * SAMPLE_RATE):int(0.3 * SAMPLE_RATE)]).max() > 0.05
+
+def test_keeps_continuous_speech_without_silence():
+    vad = EnergyVAD()
+    audio = voiced(3.0, level=0.05) * (1 + 0.2 * np.sin(np.linspace(0, 20, 3 * SAMPLE_RATE))).astype(np.float32)
+    result = vad.process(audio)
+    assert result.speech_seconds > 2.9
+    assert result.removed_seconds < 0.05
+
+def test_loud_clip_without_speech_frames_passes_through():
+    vad = EnergyVAD()
+    # Broadband noise fails the flatness test, but is far above the quiet level
+    audio = silence(2.0, level=0.1, seed=4)
+    result = vad.process(audio)
+    assert result.audio is audio
+    assert result.has_speech
+    assert result.removed_seconds == 0.0
+
+def test_quiet_noise_is_dropped_not_passed_through():
+    vad = EnergyVAD()
+    result = vad.process(silence(2.0, level=10 ** (-60 / 20), seed=5))
+    assert not result.has_speech
@@ -0,0 +1,160 @@
+import asyncio
+import contextvars
+import threading
+import pytest
+from worker_pool import WorkerPool, PipelineBusyError
+
+def admitted(pool):
+    return pool.stats()["admitted"]
+
+def test_run_returns_result_in_caller_context():
+    pool = WorkerPool(max_workers=1, queue_size=0)
+    request_id = contextvars.ContextVar("request_id")
+
+    async def main():
+        request_id.set("abc")
+        return await pool.run(lambda x: (x * 2, request_id.get()), 21)
+
+    assert asyncio.run(main()) == (42, "abc")
+    assert admitted(pool) == 0
+    pool.shutdown()
+
+def test_rejects_beyond_workers_plus_queue():
+    pool = WorkerPool(max_workers=1, queue_size=1)
+    gate = threading.Event()
+
+    async def main():
+        jobs = [asyncio.ensure_future(pool.run(gate.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PipelineBusyError):
+            await pool.run(gate.wait)
+        gate.set()
+        await asyncio.gather(*jobs)
+
+    asyncio.run(main())
+    assert pool.stats()["rejected"] == 1
+    assert admitted(pool) == 0
+    pool.shutdown()
+
+def test_releases_slot_when_job_fails():
+    pool = WorkerPool(max_workers=1, queue_size=0)
+
+    def fail():
+        raise ValueError("boom")
+
+    async def main():
+        with pytest.raises(ValueError):
+            await pool.run(fail)
+
+    asyncio.run(main())
+    assert admitted(pool) == 0
+    pool.shutdown()
+
+def test_cancelled_request_keeps_slot_until_job_ends():
+    pool = WorkerPool(max_workers=1, queue_size=0)
+    started, gate = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        gate.wait()
+
+    async def main():
+        task = asyncio.ensure_future(pool.run(job))
+        await asyncio.to_thread(started.wait)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert admitted(pool) == 1
+        with pytest.raises(PipelineBusyError):
+            pool.reserve()
+        gate.set()
+        for _ in range(100):
+            if admitted(pool) == 0:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert admitted(pool) == 0
+    pool.shutdown()
+
+def test_reservation_holds_one_slot_for_all_stages():
+    pool = WorkerPool(max_workers=1, queue_size=0)
+
+    async def main():
+        with pool.reserve() as slot:
+            assert await slot.run(len, "ab") == 2
+            assert await slot.run(len, "abc") == 3
+            assert admitted(pool) == 1
+            with pytest.raises(PipelineBusyError):
+                pool.reserve()
+        assert admitted(pool) == 0
+
+    asyncio.run(main())
+    pool.shutdown()
+
+def test_stream_releases_slot_when_exhausted():
+    pool = WorkerPool(max_workers=1, queue_size=0)
+
+    async def main():
+        stream = pool.iterate(lambda n: iter(range(n)), 3)
+        assert admitted(pool) == 1
+        return [item async for item in stream]
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert admitted(pool) == 0
+    pool.shutdown()
+
+def test_stream_releases_slot_when_iterator_fails():
+    pool = WorkerPool(max_workers=1, queue_size=0)
+
+    def items():
+        yield 1
+        raise ValueError("boom")
+
+    async def main():
+        received = []
+        with pytest.raises(ValueError):
+            async for item in pool.iterate(items):
+                received.append(item)
+        return received
+
+    assert asyncio.run(main()) == [1]
+    assert admitted(pool) == 0
+    pool.shutdown()
+
+def test_stream_never_iterated_releases_slot_on_aclose():
+    pool = WorkerPool(max_workers=1, queue_size=0)
+
+    async def main():
+        stream = pool.iterate(lambda: iter([1, 2]))
+        assert admitted(pool) == 1
+        await stream.aclose()
+        await stream.aclose()
+
+    asyncio.run(main())
+    assert admitted(pool) == 0
+    pool.shutdown()
+
+def test_stream_closed_midway_releases_slot_once():
+    pool = WorkerPool(max_workers=1, queue_size=0)
+
+    async def main():
+        stream = pool.iterate(lambda: iter(range(10)))
+        assert await stream.__anext__() == 0
+        await stream.aclose()
+
+    asyncio.run(main())
+    assert admitted(pool) == 0
+    pool.shutdown()
+
+def test_stream_rejected_before_it_starts_when_saturated():
+    pool = WorkerPool(max_workers=1, queue_size=0)
+
+    async def main():
+        with pool.reserve():
+            with pytest.raises(PipelineBusyError):
+                pool.iterate(lambda: iter([]))
+
+    asyncio.run(main())
+    assert admitted(pool) == 0
+    pool.shutdown()
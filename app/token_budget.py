@@ -0,0 +1,110 @@
+import threading
+from typing import List, Optional, Tuple
+from langchain_core.documents import Document
+from session_store import format_history
+from config.logging import logger
+
+def _load_encoding():
+    # cl100k_base is close to the Llama 3 tokenizer; fall back to an estimate
+    # when tiktoken (or its BPE file) is unavailable
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating tokens from length: {str(e)}")
+        return None
+
+_encoding = _load_encoding()
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+def fit_prompt(
+    system_tokens: int,
+    query: str,
+    summary: str,
+    turns: List[Tuple[str, str]],
+    docs: List[Document],
+    budget: Optional[int],
+    context_budget: Optional[int]
+) -> Tuple[str, List[Document], dict]:
+    """Pick the context documents and history that fit the prompt budget.
+
+    Retrieved documents are kept in rank order up to `context_budget`; the
+    rest of the budget goes to the running summary and then to the newest
+    turns. With `budget` set to None nothing is dropped and the prompt is
+    only accounted for. Returns (chat_history, docs, usage).
+    """
+    query_tokens = count_tokens(query)
+    available = None if budget is None else budget - system_tokens - query_tokens
+
+    context_limit = available
+    if context_budget is not None and available is not None:
+        context_limit = min(context_budget, available)
+    kept_docs, context_tokens = [], 0
+    for doc in docs:
+        tokens = count_tokens(doc.page_content)
+        if context_limit is not None and context_tokens + tokens > context_limit:
+            continue
+        kept_docs.append(doc)
+        context_tokens += tokens
+
+    history_limit = None if available is None else available - context_tokens
+    summary_tokens = count_tokens(summary)
+    if history_limit is not None and summary_tokens > history_limit:
+        summary, summary_tokens = "", 0
+
+    # Newest turns first, so the oldest are the ones that fall out
+    kept_turns, history_tokens = [], 0
+    for turn in reversed(turns):
+        tokens = count_tokens(format_history([turn]))
+        if history_limit is not None and summary_tokens + history_tokens + tokens > history_limit:
+            break
+        kept_turns.append(turn)
+        history_tokens += tokens
+    kept_turns.reverse()
+
+    usage = {
+        "system": system_tokens,
+        "query": query_tokens,
+        "context": context_tokens,
+        "summary": summary_tokens,
+        "history": history_tokens,
+        "total": system_tokens + query_tokens + context_tokens + summary_tokens + history_tokens,
+        "budget": budget,
+        "docs_dropped": len(docs) - len(kept_docs),
+        "turns_dropped": len(turns) - len(kept_turns)
+    }
+    return format_history(kept_turns, summary), kept_docs, usage
+
+class TokenAccounting:
+    """Running totals of prompt tokens per component across requests"""
+
+    COMPONENTS = ("system", "query", "context", "summary", "history", "total")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._over_budget = 0
+        self._totals = dict.fromkeys(self.COMPONENTS, 0)
+
+    def record(self, usage: dict):
+        with self._lock:
+            self._requests += 1
+            for component in self.COMPONENTS:
+                self._totals[component] += usage[component]
+            if usage["budget"] is not None and usage["total"] > usage["budget"]:
+                self._over_budget += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self._requests
+            return {
+                "requests": requests,
+                "over_budget": self._over_budget,
+                "mean": {k: round(v / requests, 1) if requests else 0.0 for k, v in self._totals.items()}
+            }
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict
+import numpy as np
+
+class TranscriptCache:
+    """Bounded LRU from decoded PCM to transcript, with in-flight coalescing.
+
+    Keys are a BLAKE2b digest of the float32 samples, so the same recording
+    matches regardless of container or codec. When an identical clip is
+    already being transcribed, later callers wait on that call's result
+    instead of starting a second Whisper pass. Failures are not cached.
+    """
+
+    def __init__(self, max_entries: int, namespace: str = ""):
+        self.max_entries = max_entries
+        self.namespace = namespace.encode("utf-8")
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    def make_key(self, audio: np.ndarray) -> str:
+        digest = hashlib.blake2b(self.namespace, digest_size=16)
+        digest.update(memoryview(np.ascontiguousarray(audio, dtype=np.float32)).cast("B"))
+        return digest.hexdigest()
+
+    def get_or_compute(self, audio: np.ndarray, compute: Callable[[np.ndarray], str]) -> str:
+        """Return the cached transcript for `audio`, computing it at most once"""
+        key = self.make_key(audio)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key]
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = self._in_flight[key] = Future()
+                self._misses += 1
+                owner = True
+            else:
+                self._coalesced += 1
+                owner = False
+
+        if not owner:
+            return pending.result()
+
+        try:
+            transcript = compute(audio)
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if self.max_entries > 0:
+                self._entries[key] = transcript
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        pending.set_result(transcript)
+        return transcript
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "in_flight": len(self._in_flight),
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced
+            }
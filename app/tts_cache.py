@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+from config.logging import logger
+
+class TTSCache:
+    """Content-addressed cache of synthesized audio.
+
+    Entries are keyed by a hash of the cleaned text plus every parameter that
+    changes the output (voice, format, ...). A size-bounded in-memory LRU sits
+    in front of a persistent on-disk store, so hits survive restarts and
+    rarely-used entries do not pin memory.
+
+    The disk store is bounded by `max_disk_bytes`. Hits touch the file's
+    mtime, and writes beyond the limit delete the least recently used files,
+    ordered by mtime when the cache starts. Each process tracks the files it
+    knows about, so workers sharing one directory may briefly overshoot.
+    """
+
+    def __init__(self, max_memory_bytes: int, disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = disk_dir
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_evictions = 0
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        if disk_dir:
+            try:
+                os.makedirs(disk_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning("TTS disk cache disabled: %s", e)
+                self.disk_dir = None
+        if self.disk_dir:
+            self._scan_disk()
+
+    @staticmethod
+    def make_key(text: str, **params) -> str:
+        payload = json.dumps({"text": text, **params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.bin")
+
+    def _scan_disk(self):
+        """Index existing files, oldest first, and trim them to the limit"""
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if not name.endswith(".bin"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, name[:-len(".bin")], stat.st_size))
+        with self._lock:
+            for _, key, size in sorted(files):
+                self._disk[key] = size
+                self._disk_bytes += size
+            evicted = self._trim_disk()
+        self._unlink(evicted)
+
+    def _trim_disk(self) -> list:
+        """Drop the least recently used files from the index; caller holds the lock"""
+        evicted = []
+        while self._disk and self._disk_bytes > self.max_disk_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._disk_evictions += 1
+            evicted.append(key)
+        return evicted
+
+    def _unlink(self, keys: list):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("TTS disk cache eviction failed: %s", e)
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = audio
+            self._memory_bytes += len(audio)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return audio
+
+        if self.disk_dir:
+            try:
+                with open(self._path(key), "rb") as f:
+                    audio = f.read()
+            except FileNotFoundError:
+                audio = None
+            except OSError as e:
+                logger.warning("TTS disk cache read failed: %s", e)
+                audio = None
+            if audio is not None:
+                try:
+                    os.utime(self._path(key))
+                except OSError:
+                    pass
+                self._remember(key, audio)
+                with self._lock:
+                    self._disk_hits += 1
+                    # Files written by another worker are indexed on first read
+                    self._disk_bytes -= self._disk.pop(key, 0)
+                    self._disk[key] = len(audio)
+                    self._disk_bytes += len(audio)
+                    evicted = self._trim_disk()
+                self._unlink(evicted)
+                return audio
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        self._remember(key, audio)
+        if not self.disk_dir or len(audio) > self.max_disk_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see partial audio
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("TTS disk cache write failed: %s", e)
+            return
+
+        with self._lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            self._disk[key] = len(audio)
+            self._disk_bytes += len(audio)
+            evicted = self._trim_disk()
+        self._unlink(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "disk_evictions": self._disk_evictions,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses
+            }
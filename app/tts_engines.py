@@ -0,0 +1,112 @@
+import io
+import json
+import subprocess
+import numpy as np
+import soundfile as sf
+from typing import Tuple
+from config.setting import Config
+from config.logging import logger
+
+class TTSEngine:
+    """Text-to-speech backend producing float32 mono PCM"""
+
+    name = "base"
+
+    def synthesize(self, text: str) -> Tuple[np.ndarray, int]:
+        """Return (samples, sample_rate) for one piece of text"""
+        raise NotImplementedError
+
+    def cache_params(self) -> dict:
+        """Parameters that change the output, used in TTS cache keys"""
+        return {"engine": self.name}
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS over HTTP"""
+
+    name = "gtts"
+
+    def __init__(self, lang: str = "en", slow: bool = False):
+        self.lang = lang
+        self.slow = slow
+
+    def synthesize(self, text: str) -> Tuple[np.ndarray, int]:
+        from gtts import gTTS
+
+        tts = gTTS(text=text, lang=self.lang, slow=self.slow)
+        buffer = io.BytesIO()
+        tts.write_to_fp(buffer)
+        buffer.seek(0)
+
+        audio, sr = sf.read(buffer, dtype="float32")
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        return audio, sr
+
+    def cache_params(self) -> dict:
+        return {"engine": self.name, "lang": self.lang, "slow": self.slow}
+
+class EspeakEngine(TTSEngine):
+    """Local offline synthesis with espeak-ng"""
+
+    name = "espeak"
+
+    def __init__(self, binary: str, voice: str, speed: int):
+        self.binary = binary
+        self.voice = voice
+        self.speed = speed
+
+    def synthesize(self, text: str) -> Tuple[np.ndarray, int]:
+        result = subprocess.run(
+            [self.binary, "-v", self.voice, "-s", str(self.speed), "--stdout"],
+            input=text.encode("utf-8"),
+            capture_output=True,
+            check=True
+        )
+        # espeak-ng streams a 16-bit mono WAV whose size fields are left
+        # unset, so read the rate from the header and view the samples directly
+        wav = result.stdout
+        sample_rate = int.from_bytes(wav[24:28], "little")
+        audio = np.frombuffer(wav, dtype="<i2", offset=44).astype(np.float32) / 32768.0
+        return audio, sample_rate
+
+    def cache_params(self) -> dict:
+        return {"engine": self.name, "voice": self.voice, "speed": self.speed}
+
+class PiperEngine(TTSEngine):
+    """Local offline neural synthesis with a Piper voice model"""
+
+    name = "piper"
+
+    def __init__(self, binary: str, model_path: str):
+        self.binary = binary
+        self.model_path = model_path
+        with open(f"{model_path}.json", "r") as f:
+            self.sample_rate = json.load(f)["audio"]["sample_rate"]
+
+    def synthesize(self, text: str) -> Tuple[np.ndarray, int]:
+        result = subprocess.run(
+            [self.binary, "--model", self.model_path, "--output_raw"],
+            input=text.encode("utf-8"),
+            capture_output=True,
+            check=True
+        )
+        audio = np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768.0
+        return audio, self.sample_rate
+
+    def cache_params(self) -> dict:
+        return {"engine": self.name, "model": self.model_path}
+
+def create_tts_engine() -> TTSEngine:
+    """Build the TTS engine selected in the settings"""
+    engine = Config.tts_engine.lower()
+    if engine == "gtts":
+        tts_engine = GTTSEngine(lang=Config.tts_voice)
+    elif engine == "espeak":
+        tts_engine = EspeakEngine(Config.espeak_binary, Config.tts_voice, Config.tts_speed)
+    elif engine == "piper":
+        tts_engine = PiperEngine(Config.piper_binary, Config.piper_model)
+    else:
+        raise ValueError(f"Unknown TTS engine: {Config.tts_engine}")
+
+    logger.info(f"TTS engine initialized: {tts_engine.name}")
+    return tts_engine
@@ -0,0 +1,90 @@
+import numpy as np
+from dataclasses import dataclass
+
+@dataclass
+class VADResult:
+    audio: np.ndarray
+    speech_seconds: float
+    removed_seconds: float
+
+    @property
+    def has_speech(self) -> bool:
+        return self.speech_seconds > 0
+
+class EnergyVAD:
+    """Frame-level voice activity detection using energy and spectral flatness.
+
+    A frame counts as speech when its energy clears an adaptive threshold
+    (noise floor estimated from the quietest frames plus a margin, capped at
+    `speech_level_db` so clips with no silence in them still pass) and its
+    spectrum is not flat like broadband noise. Speech regions are padded,
+    leading/trailing silence is dropped and internal pauses are shortened
+    to at most `max_pause_ms`. A clip with no speech frames but an overall
+    level `margin_db` above `min_energy_db` is passed through untrimmed, so
+    STT rather than the VAD decides whether anything was said.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        margin_db: float = 12.0,
+        min_energy_db: float = -55.0,
+        speech_level_db: float = -35.0,
+        max_flatness: float = 0.5,
+        padding_ms: int = 200,
+        max_pause_ms: int = 500
+    ):
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.speech_level_db = speech_level_db
+        self.max_flatness = max_flatness
+        self.padding_frames = max(1, padding_ms // frame_ms)
+        self.max_pause_frames = max(1, max_pause_ms // frame_ms)
+
+    def _speech_frames(self, frames: np.ndarray) -> np.ndarray:
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        noise_floor = np.percentile(energy_db, 10)
+        threshold = min(max(noise_floor + self.margin_db, self.min_energy_db), self.speech_level_db)
+
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(self.frame), axis=1)) + 1e-10
+        flatness = np.exp(np.mean(np.log(spectrum), axis=1)) / np.mean(spectrum, axis=1)
+
+        return (energy_db > threshold) & (flatness < self.max_flatness)
+
+    def _pad(self, speech: np.ndarray) -> np.ndarray:
+        # Dilate speech flags by the padding on both sides
+        kernel = np.ones(2 * self.padding_frames + 1)
+        return np.convolve(speech.astype(np.float32), kernel, mode="same") > 0
+
+    def process(self, audio: np.ndarray) -> VADResult:
+        n_frames = len(audio) // self.frame
+        total_seconds = len(audio) / self.sample_rate
+        if not n_frames:
+            return VADResult(audio[:0], 0.0, total_seconds)
+
+        frames = audio[:n_frames * self.frame].reshape(n_frames, self.frame)
+        speech = self._speech_frames(frames)
+        if not speech.any():
+            level_db = 10 * np.log10(np.mean(frames * frames) + 1e-10)
+            if level_db > self.min_energy_db + self.margin_db:
+                return VADResult(audio, total_seconds, 0.0)
+            return VADResult(audio[:0], 0.0, total_seconds)
+        keep = self._pad(speech)
+
+        # Keep the first `max_pause_frames` of every silent run between speech
+        first, last = np.flatnonzero(keep)[[0, -1]]
+        silent = ~keep[first:last + 1]
+        index = np.arange(len(silent))
+        run_start = silent & ~np.concatenate(([False], silent[:-1]))
+        position_in_run = index - np.maximum.accumulate(np.where(run_start, index, 0))
+        keep[first:last + 1] |= silent & (position_in_run < self.max_pause_frames)
+
+        trimmed = frames[keep].reshape(-1)
+        return VADResult(
+            audio=trimmed,
+            speech_seconds=float(speech.sum() * self.frame / self.sample_rate),
+            removed_seconds=total_seconds - len(trimmed) / self.sample_rate
+        )
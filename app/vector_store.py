@@ -1,60 +1,171 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_pinecone import PineconeVectorStore
 from langchain.embeddings.base import Embeddings
 from pinecone import Pinecone
 from sentence_transformers import SentenceTransformer
+from local_index import LocalVectorIndex, LocalIndexRetriever
+from ingestion import ingest_corpus, read_manifest, manifest_version, manifest_path_for
+from startup import shared_model
+from metrics import timed
 from config.setting import Config
 from config.logging import logger
+from functools import lru_cache
 from typing import List
+import os
+import threading
+import numpy as np
+
+def load_sentence_transformer(model_name: str, runtime: str, onnx_file: str = ""):
+    """Load (once per process) the SentenceTransformer for a runtime"""
+    def factory():
+        if runtime == "onnx":
+            model_kwargs = {"file_name": onnx_file} if onnx_file else None
+            return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+        if runtime == "int8":
+            import torch
+            model = SentenceTransformer(model_name, device="cpu")
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        if runtime == "torch":
+            return SentenceTransformer(model_name)
+        raise ValueError(f"Unknown embedding runtime: {runtime}")
+    
+    return shared_model(("sentence-transformer", model_name, runtime, onnx_file), factory)
 
 class SentenceTransformerEmbeddings(Embeddings):
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    """all-MiniLM-L6-v2 embeddings with a selectable CPU runtime.
+
+    runtime is "torch" (fp32, the original), "int8" (dynamic int8
+    quantization of the Linear layers) or "onnx" (ONNX Runtime, optionally
+    a pre-quantized file via onnx_file). Repeated query strings are served
+    from an LRU cache.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        runtime: str = "torch",
+        batch_size: int = 32,
+        query_cache_size: int = 1024,
+        onnx_file: str = ""
+    ):
+        self.runtime = runtime
+        self.batch_size = batch_size
+        self.model = load_sentence_transformer(model_name, runtime, onnx_file)
+        self._cached_query = lru_cache(maxsize=query_cache_size)(self._encode_query)
+        logger.info(f"Embeddings initialized with {runtime} runtime")
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return self.model.encode(texts).tolist()
+        return self.model.encode(texts, batch_size=self.batch_size).tolist()
     
     def embed_query(self, text: str) -> List[float]:
-        return self.model.encode([text])[0].tolist()
+        with timed("embedding"):
+            return list(self._cached_query(text))
+    
+    def _encode_query(self, text: str) -> tuple:
+        return tuple(self.model.encode([text])[0].tolist())
 
 class VectorStoreService:
     def __init__(self):
-        self.pc = Pinecone(api_key=Config.pinecone_api_key)
-        self.index = self.pc.Index(Config.pinecone_index)
-        self.embeddings = SentenceTransformerEmbeddings()
+        # "pinecone" for the hosted index, "local" for the in-process mmap index
+        self.backend = Config.vector_backend.lower()
+        if self.backend == "local":
+            self.local_index = LocalVectorIndex(Config.local_index_dir)
+        elif self.backend == "pinecone":
+            self.pc = Pinecone(api_key=Config.pinecone_api_key)
+            self.index = self.pc.Index(Config.pinecone_index)
+        else:
+            raise ValueError(f"Unknown vector backend: {Config.vector_backend}")
+        self.embeddings = SentenceTransformerEmbeddings(
+            runtime=Config.embedding_runtime,
+            batch_size=Config.embedding_batch_size,
+            query_cache_size=Config.embedding_query_cache_size,
+            onnx_file=Config.embedding_onnx_file
+        )
         self._vector_store = None
-        logger.info("Vector store service initialized")
+        self.manifest_path = manifest_path_for(self.backend)
+        self._manifest_mtime = None
+        self._corpus_version = None
+        self._pending_lock = threading.Lock()
+        self._pending_upserts = []
+        self._pending_deletes = []
+        logger.info(f"Vector store service initialized with {self.backend} backend")
 
-    def load_and_chunk_data(self) -> List[str]:
-        with open("data/info.txt", "r") as f:
-            text = f.read()
+    @property
+    def corpus_version(self) -> str:
+        """Changes on every ingestion, so answer caches built on older content are dropped.
+
+        Ingestion usually runs in another process (`python ingestion.py`), so
+        the manifest is re-read whenever its mtime changes.
+        """
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._manifest_mtime or self._corpus_version is None:
+            self._corpus_version = manifest_version(read_manifest(self.manifest_path))
+            self._manifest_mtime = mtime
+        return self._corpus_version
+
+    def initialize_vector_store(self) -> dict:
+        """Incrementally sync the configured sources into the vector store"""
+        return ingest_corpus(self)
+
+    def reset_index(self):
+        """Drop everything in the namespace before a first, manifest-less ingestion"""
+        if self.backend == "local":
+            with self._pending_lock:
+                self._pending_deletes.extend(self.local_index.ids)
+            return
+        try:
+            self.index.delete(delete_all=True, namespace="candidate_info")
+        except Exception as e:
+            logger.warning(f"Could not clear Pinecone namespace: {str(e)}")
+
+    def upsert_chunks(self, ids: List[str], texts: List[str], vectors: np.ndarray):
+        if self.backend == "local":
+            # Collected and written once in commit_chunks
+            with self._pending_lock:
+                self._pending_upserts.append((ids, texts, vectors))
+            return
         
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,    # Larger chunks for better context
-            chunk_overlap=50, # More overlap for continuity
-            length_function=len
+        self.index.upsert(
+            vectors=[
+                {'id': chunk_id, 'values': vector.tolist(), 'metadata': {'text': text}}
+                for chunk_id, text, vector in zip(ids, texts, vectors)
+            ],
+            namespace="candidate_info"
         )
-        chunks = splitter.split_text(text)
-        logger.info(f"Created {len(chunks)} text chunks")
-        return chunks
+        logger.info(f"Upserted {len(ids)} vectors in Pinecone")
 
-    def initialize_vector_store(self):
-        chunks = self.load_and_chunk_data()
-        embeddings_list = self.embeddings.embed_documents(chunks)
+    def delete_chunks(self, ids: List[str]):
+        if self.backend == "local":
+            with self._pending_lock:
+                self._pending_deletes.extend(ids)
+            return
         
-        vectors = [
-            {
-                'id': f"chunk_{i}",
-                'values': embedding,
-                'metadata': {'text': chunk}
-            }
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings_list))
-        ]
+        for start in range(0, len(ids), 1000):
+            self.index.delete(ids=ids[start:start + 1000], namespace="candidate_info")
+        logger.info(f"Deleted {len(ids)} vectors from Pinecone")
+
+    def commit_chunks(self):
+        """Apply collected changes to the local index in a single write"""
+        if self.backend != "local":
+            return
+        with self._pending_lock:
+            upserts, deletes = self._pending_upserts, self._pending_deletes
+            self._pending_upserts, self._pending_deletes = [], []
+        if not upserts and not deletes:
+            return
         
-        self.index.upsert(vectors=vectors, namespace="candidate_info")
-        logger.info(f"Stored {len(vectors)} vectors in Pinecone")
+        ids = [chunk_id for batch_ids, _, _ in upserts for chunk_id in batch_ids]
+        texts = [text for _, batch_texts, _ in upserts for text in batch_texts]
+        vectors = np.concatenate([batch_vectors for _, _, batch_vectors in upserts]) if upserts else np.zeros((0, 0), dtype=np.float32)
+        self.local_index.update(ids, texts, vectors, deletes)
+        logger.info(f"Local index updated: {len(ids)} upserted, {len(deletes)} deleted")
 
     def get_retriever(self):
+        if self.backend == "local":
+            return LocalIndexRetriever(index=self.local_index, embeddings=self.embeddings, k=3)
+        
         if self._vector_store is None:
             self._vector_store = PineconeVectorStore(
                 index=self.index,
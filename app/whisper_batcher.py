@@ -0,0 +1,145 @@
+import queue
+import threading
+import time
+import numpy as np
+import torch
+import whisper
+from concurrent.futures import Future
+from typing import List
+from config.logging import logger
+
+# Look back this far from each 30-second boundary for a pause to cut at
+PAUSE_SEARCH_SECONDS = 5.0
+PAUSE_FRAME_SAMPLES = 320  # 20 ms at 16 kHz
+PAUSE_SMOOTH_FRAMES = 10
+
+def split_at_pauses(audio: np.ndarray, window: int = whisper.audio.N_SAMPLES) -> List[np.ndarray]:
+    """Split audio into segments of at most `window` samples, cutting each
+    one at the quietest 200 ms stretch of its last few seconds so a word
+    that straddles the 30-second boundary is not decoded in two halves.
+    """
+    search = int(PAUSE_SEARCH_SECONDS * whisper.audio.SAMPLE_RATE)
+    segments = []
+    start = 0
+    while len(audio) - start > window:
+        low = start + window - search
+        frames = (start + window - low) // PAUSE_FRAME_SAMPLES
+        region = audio[low:low + frames * PAUSE_FRAME_SAMPLES].reshape(frames, PAUSE_FRAME_SAMPLES)
+        energy = np.square(region).mean(axis=1)
+        smoothed = np.convolve(energy, np.ones(PAUSE_SMOOTH_FRAMES), mode="valid")
+        quietest = int(np.argmin(smoothed)) + PAUSE_SMOOTH_FRAMES // 2
+        cut = low + quietest * PAUSE_FRAME_SAMPLES
+        segments.append(audio[start:cut])
+        start = cut
+    segments.append(audio[start:])
+    return segments
+
+class WhisperBatcher:
+    """Collects 30-second mel segments from concurrent callers and decodes
+    them in one batched Whisper forward pass.
+
+    Callers compute their own log-mel spectrograms (in parallel, on their own
+    worker threads) and block on a Future. A single scheduler thread waits at
+    most `max_wait_ms` after the first queued segment for up to
+    `max_batch_size` segments, then runs the encoder/decoder on the stack.
+    """
+
+    def __init__(self, model, max_batch_size: int, max_wait_ms: int):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.options = whisper.DecodingOptions(
+            language="en",
+            fp16=False,
+            temperature=0.0,
+            without_timestamps=True
+        )
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._segments = 0
+        self._batch_sizes = {}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Whisper batcher started: max_batch={max_batch_size}, max_wait={max_wait_ms}ms")
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        """Transcribe float32 16 kHz audio as batched segments of up to 30 seconds"""
+        futures = [self._submit(segment) for segment in split_at_pauses(audio)]
+        return " ".join(future.result().text.strip() for future in futures).strip()
+
+    def _submit(self, segment: np.ndarray) -> Future:
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(segment),
+            n_mels=self.model.dims.n_mels
+        )
+        future = Future()
+        self._queue.put((mel, future, time.monotonic()))
+        return future
+
+    def _collect(self) -> List[tuple]:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+
+            started = time.monotonic()
+            self._record(batch, started)
+            try:
+                mels = torch.stack([mel for mel, _, _ in batch]).to(self.model.device)
+                with torch.no_grad():
+                    results = whisper.decode(self.model, mels, self.options)
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error("Batched Whisper decode failed: %s", e)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+    def _record(self, batch: List[tuple], started: float):
+        with self._stats_lock:
+            self._batches += 1
+            self._segments += len(batch)
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+            for _, _, enqueued in batch:
+                wait = started - enqueued
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "segments": self._segments,
+                "mean_batch_size": self._segments / self._batches if self._batches else 0.0,
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+                "mean_queue_wait_ms": 1000 * self._wait_total / self._segments if self._segments else 0.0,
+                "max_queue_wait_ms": 1000 * self._wait_max,
+                "queued": self._queue.qsize()
+            }
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
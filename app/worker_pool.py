@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.logging import logger
+
+_EXHAUSTED = object()
+
+class PipelineBusyError(Exception):
+    """Raised when the admission queue is full and the request is rejected"""
+
+class WorkerPool:
+    """Runs blocking pipeline stages off the event loop with bounded admission.
+
+    At most `max_workers` jobs execute at once and at most `queue_size` more
+    wait for a worker. Anything beyond that is rejected immediately with
+    PipelineBusyError so callers can answer fast instead of queueing forever.
+    Jobs run in a copy of the caller's contextvars, so the request context
+    is visible on the worker thread.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int):
+        self.max_workers = max_workers
+        self.capacity = max_workers + queue_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="pipeline"
+        )
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._rejected = 0
+        logger.info(f"Worker pool initialized: workers={max_workers}, queue={queue_size}")
+
+    def _admit(self):
+        with self._lock:
+            if self._admitted >= self.capacity:
+                self._rejected += 1
+                raise PipelineBusyError("Pipeline queue is full")
+            self._admitted += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._admitted -= 1
+
+    def _submit(self, fn, *args, **kwargs):
+        return self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run `fn` on a pipeline worker, or raise PipelineBusyError if saturated"""
+        self._admit()
+        try:
+            future = self._submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        # Release on completion rather than on await so a cancelled request
+        # keeps its slot until the worker has actually finished the job
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def reserve(self) -> "Reservation":
+        """Admit a multi-stage request now and hold one slot for all its stages.
+
+        Raises PipelineBusyError immediately if saturated, so a request is
+        never rejected halfway through. Use as a context manager.
+        """
+        self._admit()
+        return Reservation(self)
+
+    def iterate(self, fn, *args, **kwargs) -> "PipelineStream":
+        """Drive the iterator returned by `fn` on pipeline workers.
+
+        Admission is checked immediately, so PipelineBusyError is raised
+        before any response has started. The whole stream then holds a single
+        slot; each item is pulled with its own worker job so the event loop
+        never blocks between items. The slot is released when the stream is
+        exhausted or closed, so a caller that may never iterate it (a
+        response that is never sent) must call `aclose()`.
+        """
+        self._admit()
+        return PipelineStream(self, fn, *args, **kwargs)
+
+    async def _drive(self, stream: "PipelineStream", fn, *args, **kwargs):
+        context = contextvars.copy_context()
+        try:
+            iterator = await asyncio.wrap_future(self._executor.submit(context.run, fn, *args, **kwargs))
+            while True:
+                item = await asyncio.wrap_future(self._executor.submit(context.run, next, iterator, _EXHAUSTED))
+                if item is _EXHAUSTED:
+                    break
+                yield item
+        finally:
+            stream.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "capacity": self.capacity,
+                "admitted": self._admitted,
+                "rejected": self._rejected
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Worker pool shut down")
+
+class PipelineStream:
+    """Async iterator from WorkerPool.iterate that owns one admission slot.
+
+    The slot is released exactly once: when iteration ends or fails, or on
+    `aclose()`, which also covers a stream that was never started.
+    """
+
+    def __init__(self, pool: WorkerPool, fn, *args, **kwargs):
+        self.pool = pool
+        self._released = False
+        self._items = pool._drive(self, fn, *args, **kwargs)
+
+    def __aiter__(self) -> "PipelineStream":
+        return self
+
+    async def __anext__(self):
+        return await self._items.__anext__()
+
+    async def aclose(self):
+        try:
+            await self._items.aclose()
+        finally:
+            self.release()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.pool._release()
+
+class Reservation:
+    """A request's admission slot; its stages run on the pool without re-admission"""
+
+    def __init__(self, pool: WorkerPool):
+        self.pool = pool
+        self._last = None
+
+    async def run(self, fn, *args, **kwargs):
+        self._last = self.pool._submit(fn, *args, **kwargs)
+        return await asyncio.wrap_future(self._last)
+
+    def __enter__(self) -> "Reservation":
+        return self
+
+    def __exit__(self, *exc_info):
+        # As in WorkerPool.run, a job still running keeps the slot until it ends
+        if self._last is not None and not self._last.done():
+            self._last.add_done_callback(self.pool._release)
+        else:
+            self.pool._release()
@@ -1,18 +1,18 @@
 import streamlit as st
-import requests
 import io
 import sounddevice as sd
 import soundfile as sf
 import numpy as np
-import base64
 import threading
 from queue import Queue, Empty
 import json
+from voice_client import VoiceClient, create_http_session
 
 # Page config
 st.set_page_config(page_title="VoiceMate AI", page_icon="🎙️", layout="centered")
 
-BACKEND_URL = "https://harshil-pansuriya-voicemate-ai.hf.space/process_voice"
+# Raw-body endpoint: the recording is uploaded while it is still being encoded
+BACKEND_URL = "https://harshil-pansuriya-voicemate-ai.hf.space/process_voice_raw"
 
 # Optimized CSS with reduced redundancy
 st.markdown("""
@@ -67,13 +67,14 @@ st.markdown("""
 SAMPLE_RATE = 16000
 CHUNK_SIZE = 1024
 PLAYBACK_SPEED = 1.1
+REQUEST_TIMEOUT = 30
 
 # Optimized session state initialization
 @st.cache_data
 def get_default_state():
     return {
         'app_state': 'ready',
-        'recorded_audio': None,
+        'voice_result': None,
         'response_data': None,
         'recording_thread': None,
         'stop_recording': False
@@ -87,69 +88,111 @@ for key, value in get_default_state().items():
 if 'audio_queue' not in st.session_state:
     st.session_state.audio_queue = Queue()
 
+@st.cache_resource
+def get_http_session():
+    """Keep-alive connection pool shared by all browser sessions"""
+    return create_http_session()
+
+# One client per browser session, so its questions share the server-side conversation memory
+if 'voice_client' not in st.session_state:
+    st.session_state.voice_client = VoiceClient(BACKEND_URL, get_http_session(), timeout=REQUEST_TIMEOUT)
+
+class StreamingUpload:
+    """Write-only file for soundfile whose bytes are uploaded as soon as they are encoded.
+
+    Ogg pages are only ever appended, so libsndfile never seeks back to
+    patch a header; seeks just report the current position. Iterating
+    yields the encoded chunks until close(), which suits requests' chunked
+    transfer encoding.
+    """
+    
+    def __init__(self):
+        self._chunks = Queue()
+        self._position = 0
+    
+    def write(self, data):
+        self._chunks.put(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._position
+    
+    def tell(self):
+        return self._position
+    
+    def read(self, size=-1):
+        return b""
+    
+    def close(self):
+        self._chunks.put(None)
+    
+    def __iter__(self):
+        while (chunk := self._chunks.get()) is not None:
+            yield chunk
+
 class OptimizedAudioRecorder:
-    """Streamlined audio recorder with minimal overhead"""
+    """Records 16 kHz mono int16, encodes it to Ogg Opus and uploads it while recording"""
     
     def __init__(self, sample_rate=SAMPLE_RATE):
         self.sample_rate = sample_rate
-        self.audio_data = []
+        self.frames = 0
         
-    def record(self, audio_queue, stop_flag):
-        """Optimized recording method"""
-        self.audio_data = []
+    def record(self, result_queue, stop_flag, client):
+        """Put exactly one item on `result_queue`: the server reply, None or an error string"""
+        self.frames = 0
+        blocks = Queue()
+        upload = StreamingUpload()
+        reply = {}
         
+        # Encoding stays off the audio callback so it never causes dropouts
         def audio_callback(indata, frames, time, status):
             if not stop_flag['stop']:
-                self.audio_data.append(indata.copy())
+                blocks.put(indata.copy())
+        
+        uploader = threading.Thread(
+            target=lambda: reply.update(client.ask(upload)),
+            daemon=True
+        )
         
         try:
-            with sd.InputStream(
-                samplerate=self.sample_rate,
-                channels=1,
-                dtype=np.float32,
-                callback=audio_callback,
-                blocksize=CHUNK_SIZE
-            ):
-                # Efficient waiting loop
-                while not stop_flag['stop']:
-                    sd.sleep(100)  # More efficient than time.sleep
+            with sf.SoundFile(upload, 'w', self.sample_rate, 1, 'OPUS', format='OGG') as encoder:
+                uploader.start()
+                with sd.InputStream(
+                    samplerate=self.sample_rate,
+                    channels=1,
+                    dtype=np.int16,
+                    callback=audio_callback,
+                    blocksize=CHUNK_SIZE
+                ):
+                    while not stop_flag['stop']:
+                        try:
+                            block = blocks.get(timeout=0.1)
+                        except Empty:
+                            continue
+                        encoder.write(block)
+                        self.frames += len(block)
                 
-                # Process audio data
-                if self.audio_data:
-                    audio_queue.put(np.concatenate(self.audio_data, axis=0))
-                else:
-                    audio_queue.put(None)
-                    
+                # Blocks captured just before the stream closed
+                while not blocks.empty():
+                    block = blocks.get_nowait()
+                    encoder.write(block)
+                    self.frames += len(block)
+            
         except Exception as e:
-            audio_queue.put(f"Recording error: {str(e)}")
-
-def process_audio_efficiently(audio_data):
-    """Optimized audio processing"""
-    try:
-        # Efficient buffer creation
-        buffer = io.BytesIO()
-        sf.write(buffer, audio_data, samplerate=SAMPLE_RATE, format='WAV')
+            result_queue.put(f"Recording error: {str(e)}")
+            return
+        finally:
+            upload.close()
+            if uploader.is_alive():
+                uploader.join()
         
-        # Streamlined API call
-        response = requests.post(
-            BACKEND_URL,
-            files={"file": ("audio.wav", buffer.getvalue(), "audio/wav")},
-            timeout=30
-        )
-        
-        return response.json() if response.status_code == 200 else {
-            "error": f"Server error: {response.status_code}"
-        }
-        
-    except requests.exceptions.ConnectionError:
-        return {"error": "Cannot connect to server. Ensure backend is running on localhost:8080"}
-    except Exception as e:
-        return {"error": f"Processing error: {str(e)}"}
+        result_queue.put(reply if self.frames else None)
 
-def play_audio_response(audio_base64):
+def play_audio_response(audio_bytes):
     """Optimized audio playback"""
     try:
-        audio_data, original_rate = sf.read(io.BytesIO(base64.b64decode(audio_base64)))
+        audio_data, original_rate = sf.read(io.BytesIO(audio_bytes))
         sd.play(audio_data, samplerate=int(original_rate * PLAYBACK_SPEED))
         sd.wait()
     except Exception as e:
@@ -186,14 +229,14 @@ if st.session_state.app_state == 'ready':
             st.session_state.app_state = 'recording'
             st.session_state.stop_recording = False
             
-            # Start recording thread
+            # Start recording thread; it uploads while recording and queues the reply
             stop_flag = {'stop': False}
             st.session_state.stop_flag = stop_flag
             
             recorder = OptimizedAudioRecorder()
             thread = threading.Thread(
                 target=recorder.record,
-                args=(st.session_state.audio_queue, stop_flag),
+                args=(st.session_state.audio_queue, stop_flag, st.session_state.voice_client),
                 daemon=True
             )
             thread.start()
@@ -213,7 +256,7 @@ elif st.session_state.app_state == 'recording':
             st.session_state.app_state = 'processing'
             st.rerun()
     
-    # Non-blocking audio check
+    # Non-blocking check for a recording error
     try:
         audio_result = st.session_state.audio_queue.get_nowait()
         if isinstance(audio_result, str):  # Error
@@ -221,8 +264,8 @@ elif st.session_state.app_state == 'recording':
             cleanup_resources()
             st.session_state.app_state = 'ready'
             st.rerun()
-        elif audio_result is not None:
-            st.session_state.recorded_audio = audio_result
+        else:
+            st.session_state.voice_result = audio_result
             st.session_state.app_state = 'processing'
             st.rerun()
     except Empty:
@@ -234,48 +277,35 @@ elif st.session_state.app_state == 'processing':
         unsafe_allow_html=True
     )
     
-    # Handle audio processing
-    if st.session_state.recorded_audio is None:
-        try:
-            audio_result = st.session_state.audio_queue.get(timeout=3)
-            if isinstance(audio_result, str):
-                st.error(f"❌ {audio_result}")
-                cleanup_resources()
-                st.session_state.app_state = 'ready'
-                st.rerun()
-            elif audio_result is not None:
-                st.session_state.recorded_audio = audio_result
-            else:
-                st.error("❌ No audio recorded")
-                cleanup_resources()
-                st.session_state.app_state = 'ready'
-                st.rerun()
-        except Empty:
-            st.error("❌ Recording timeout")
-            cleanup_resources()
-            st.session_state.app_state = 'ready'
-            st.rerun()
-    
-    # Process audio
-    if st.session_state.recorded_audio is not None:
+    # The upload finishes right after recording stops; wait for the reply
+    if st.session_state.voice_result is None:
         with st.spinner("🤖 Processing Your Question..."):
-            result = process_audio_efficiently(st.session_state.recorded_audio)
-            
-            if "error" in result:
-                st.error(f"❌ {result['error']}")
-            else:
-                st.session_state.response_data = result
-            
-            # Reset for next interaction
-            cleanup_resources()
-            st.session_state.recorded_audio = None
-            st.session_state.app_state = 'ready'
-            st.rerun()
+            try:
+                # Room for one retry of the request plus its Retry-After wait
+                st.session_state.voice_result = st.session_state.audio_queue.get(timeout=2 * REQUEST_TIMEOUT + 10)
+            except Empty:
+                st.session_state.voice_result = "Request timeout"
+    
+    result = st.session_state.voice_result
+    if isinstance(result, str):
+        st.error(f"❌ {result}")
+    elif not result:
+        st.error("❌ No audio recorded")
+    elif "error" in result:
+        st.error(f"❌ {result['error']}")
+    else:
+        st.session_state.response_data = result
+    
+    # Reset for next interaction
+    cleanup_resources()
+    st.session_state.voice_result = None
+    st.session_state.app_state = 'ready'
+    st.rerun()
 
 # Response display
 if st.session_state.response_data:
     response_text = st.session_state.response_data.get("response_text", "No response")
-    audio_base64 = st.session_state.response_data.get("audio_response", "")
+    audio_response = st.session_state.response_data.get("audio_response", b"")
     
     st.success("🎯 AI Response:")
     try:
@@ -284,9 +314,9 @@ if st.session_state.response_data:
     except ValueError:
         st.markdown(response_text, unsafe_allow_html=False)
     
-    if audio_base64:
+    if audio_response:
         with st.spinner("🔊"):
-            play_audio_response(audio_base64)
+            play_audio_response(audio_response)
     
     st.session_state.response_data = None
     
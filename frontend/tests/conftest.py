@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The frontend runs as a flat script directory (`streamlit run frontend.py`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+import json
+import requests
+from voice_client import IDEMPOTENCY_HEADER, SESSION_HEADER, VoiceClient, create_http_session
+
+URL = "https://backend.test/process_voice_raw"
+# Long enough to overflow a typical 8 KB header limit if it were sent as a header
+REPLY_TEXT = "A long answer. " * 1000
+REPLY_AUDIO = b"fLaC\r\n--\x00\xff audio"
+
+class RecordingAdapter(requests.adapters.BaseAdapter):
+    """Answers every request with a canned audio reply and keeps the requests"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "multipart/mixed; boundary=b0undary"
+        response.headers[SESSION_HEADER] = request.headers.get(SESSION_HEADER, "")
+        response._content = b"".join([
+            b"--b0undary\r\nContent-Type: application/json\r\n\r\n",
+            json.dumps({"response_text": REPLY_TEXT, "has_memory": True}).encode("utf-8"),
+            b"\r\n--b0undary\r\nContent-Type: audio/flac\r\n\r\n",
+            REPLY_AUDIO,
+            b"\r\n--b0undary--\r\n",
+        ])
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+def make_client():
+    http = create_http_session()
+    adapter = RecordingAdapter()
+    http.mount("https://", adapter)
+    return VoiceClient(URL, http), adapter
+
+def test_requests_share_one_session():
+    client, adapter = make_client()
+    first = client.ask([b"first"])
+    second = client.ask([b"second"])
+
+    assert "error" not in first and "error" not in second
+    session_ids = [request.headers[SESSION_HEADER] for request in adapter.requests]
+    assert len(session_ids) == 2
+    assert session_ids[0] and session_ids[0] == session_ids[1]
+
+def test_clients_get_separate_sessions():
+    first, _ = make_client()
+    second, _ = make_client()
+    assert first.session_id != second.session_id
+
+class TimeoutOnceAdapter(RecordingAdapter):
+    """Times out on the first request after consuming its body, then answers"""
+
+    def __init__(self):
+        super().__init__()
+        self.bodies = []
+
+    def send(self, request, **kwargs):
+        body = request.body
+        self.bodies.append(body if isinstance(body, bytes) else b"".join(body))
+        if len(self.bodies) == 1:
+            self.requests.append(request)
+            raise requests.exceptions.ReadTimeout("slow")
+        return super().send(request, **kwargs)
+
+def test_retry_reuses_idempotency_key_and_full_body():
+    http = create_http_session()
+    adapter = TimeoutOnceAdapter()
+    http.mount("https://", adapter)
+    client = VoiceClient(URL, http)
+
+    reply = client.ask([b"one", b"two"])
+
+    assert reply["response_text"] == REPLY_TEXT
+    keys = [request.headers[IDEMPOTENCY_HEADER] for request in adapter.requests]
+    assert len(keys) == 2 and keys[0] == keys[1]
+    assert adapter.bodies == [b"onetwo", b"onetwo"]
+
+def test_questions_get_distinct_idempotency_keys():
+    client, adapter = make_client()
+    client.ask([b"first"])
+    client.ask([b"second"])
+    keys = [request.headers[IDEMPOTENCY_HEADER] for request in adapter.requests]
+    assert keys[0] != keys[1]
+
+def test_multipart_reply_is_decoded_without_base64():
+    client, adapter = make_client()
+    reply = client.ask([b"audio"])
+
+    assert reply == {"response_text": REPLY_TEXT, "audio_response": REPLY_AUDIO}
+    assert adapter.requests[0].headers["Accept"] == "multipart/mixed"
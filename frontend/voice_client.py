@@ -0,0 +1,125 @@
+"""HTTP side of the Streamlit client, kept free of Streamlit and audio devices"""
+import base64
+import json
+import time
+import uuid
+from http.cookiejar import DefaultCookiePolicy
+import requests
+
+SESSION_HEADER = "X-Session-ID"
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+def parse_multipart(body, content_type):
+    """Split a multipart body into (media type, content) pairs"""
+    boundary = content_type.split("boundary=", 1)[1].split(";")[0].strip().strip('"')
+    parts = []
+    for section in body.split(b"--" + boundary.encode("ascii"))[1:]:
+        if section.startswith(b"--"):
+            break
+        head, _, content = section.partition(b"\r\n\r\n")
+        media = ""
+        for line in head.decode("latin-1").split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-type":
+                media = value.strip()
+        parts.append((media, content[:-2] if content.endswith(b"\r\n") else content))
+    return parts
+
+def create_http_session():
+    """Keep-alive connection pool shared by all questions, so only the first pays the TLS handshake"""
+    session = requests.Session()
+    # Shared across browser sessions: the session travels in X-Session-ID per VoiceClient,
+    # and a stored cookie would leak one user's conversation into another's requests
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=8))
+    return session
+
+class VoiceClient:
+    """Sends one browser session's questions to the backend.
+
+    Every request carries the same X-Session-ID, so the server keeps one
+    conversation memory per browser session instead of starting a new one
+    for each question. Each question gets its own Idempotency-Key, reused
+    when it is retried after a timeout, a dropped connection or a 503, so
+    the server answers the retry from the first attempt instead of running
+    the pipeline and saving the turn twice.
+    """
+
+    def __init__(self, url, http, timeout=30, retries=1, max_retry_wait=5):
+        self.url = url
+        self.http = http
+        self.timeout = timeout
+        self.retries = retries
+        self.max_retry_wait = max_retry_wait
+        self.session_id = uuid.uuid4().hex
+
+    def _post(self, body, idempotency_key):
+        # Multipart keeps long answers out of headers and the FLAC audio out of base64
+        return self.http.post(
+            self.url,
+            data=body,
+            params={"format": "flac"},
+            headers={
+                "Content-Type": "audio/ogg; codecs=opus",
+                "Accept": "multipart/mixed",
+                SESSION_HEADER: self.session_id,
+                IDEMPOTENCY_HEADER: idempotency_key
+            },
+            timeout=self.timeout
+        )
+
+    def ask(self, chunks):
+        """Upload encoded audio as it is produced and decode the reply without base64"""
+        idempotency_key = uuid.uuid4().hex
+        source = iter(chunks)
+        sent = []
+
+        def stream():
+            for chunk in source:
+                sent.append(chunk)
+                yield chunk
+
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                if attempt == 0:
+                    # A generator body is sent with chunked transfer encoding over the pooled connection
+                    response = self._post(stream(), idempotency_key)
+                else:
+                    # Opus is small, so a retry resends the whole clip from memory
+                    sent.extend(source)
+                    response = self._post(b"".join(sent), idempotency_key)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if last:
+                    return {"error": "Cannot connect to server. Ensure backend is running on localhost:8080"}
+                continue
+            except Exception as e:
+                return {"error": f"Processing error: {str(e)}"}
+
+            if response.status_code == 503 and not last:
+                retry_after = response.headers.get("Retry-After", "1")
+                time.sleep(min(float(retry_after) if retry_after.isdigit() else 1.0, self.max_retry_wait))
+                continue
+            return self._decode(response)
+
+    @staticmethod
+    def _decode(response):
+        try:
+            if response.status_code != 200:
+                return {"error": f"Server error: {response.status_code}"}
+
+            content_type = response.headers.get("content-type", "")
+            if content_type.startswith("multipart/"):
+                parts = parse_multipart(response.content, content_type)
+                metadata = next((json.loads(content) for media, content in parts if media.startswith("application/json")), {})
+                audio = next((content for media, content in parts if media.startswith("audio/")), b"")
+                return {"response_text": metadata.get("response_text", "No response"), "audio_response": audio}
+
+            # Older servers ignore Accept and answer with JSON and base64 audio
+            result = response.json()
+            return {
+                "response_text": result.get("response_text", "No response"),
+                "audio_response": base64.b64decode(result.get("audio_response") or "")
+            }
+        except Exception as e:
+            return {"error": f"Processing error: {str(e)}"}